@@ -3,25 +3,56 @@ API 端点实现 - 任务管理
 
 提供任务创建、查询、列表等 RESTful API
 """
+import asyncio
 import os
 import shutil
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
-from fastapi import APIRouter, File, Form, HTTPException, UploadFile, Response
+from fastapi import APIRouter, File, Form, HTTPException, Request, UploadFile, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
 
-from src.models import JobMetadata, JobMode, JobStatus
+from src.models import JOB_MODE_BY_VALUE, JobMetadata, JobMode, JobStatus
 from src.schemas import CreateJobResponse, ErrorResponse, JobDetailResponse, JobListItem
 from src.services import job_storage
-from src.utils import extract_video_info, save_uploaded_file
+from src.utils import extract_video_info, extract_video_info_from_upload, save_uploaded_file
 
 router = APIRouter(prefix="/api/jobs", tags=["jobs"])
 
 
+def _not_modified(request: Request, etag: str) -> bool:
+    """客户端缓存的 ETag 是否仍然有效"""
+    return request.headers.get("if-none-match") == etag
+
+
+async def _ingest(upload: UploadFile, destination: Path) -> Tuple[Path, int]:
+    """在线程池中流式保存上传文件，返回 (保存路径, 写入字节数)"""
+    size = await run_in_threadpool(save_uploaded_file, upload, destination)
+    return destination, size
+
+
+def _created_response(metadata: JobMetadata) -> ORJSONResponse:
+    """
+    创建任务的 201 响应。字段取自已校验的 JobMetadata，直接由 orjson 编码返回；
+    返回 Response 时 FastAPI 不再按 response_model 重新校验，模型仅用于 OpenAPI 文档。
+    """
+    return ORJSONResponse(
+        {
+            "job_id": metadata.job_id,
+            "status": metadata.status,
+            "mode": metadata.mode,
+            "created_at": metadata.created_at,
+        },
+        status_code=201,
+    )
+
+
 @router.post(
     "",
     response_model=CreateJobResponse,
     status_code=201,
+    response_class=ORJSONResponse,
     responses={400: {"model": ErrorResponse}},
 )
 async def create_job(
@@ -30,7 +61,7 @@ async def create_job(
     reference: Optional[UploadFile] = File(None),
     distorted: Optional[UploadFile] = File(None),
     preset: Optional[str] = Form("medium"),
-) -> CreateJobResponse:
+) -> Response:
     """
     创建新的视频质量分析任务
 
@@ -41,9 +72,8 @@ async def create_job(
     - **preset**: 单文件模式下的转码预设（默认 medium）
     """
     # 验证模式
-    try:
-        job_mode = JobMode(mode)
-    except ValueError:
+    job_mode = JOB_MODE_BY_VALUE.get(mode)
+    if job_mode is None:
         raise HTTPException(
             status_code=400,
             detail=f"Invalid mode: {mode}. Must be 'single_file' or 'dual_file'",
@@ -73,13 +103,12 @@ async def create_job(
         # 创建任务
         job = job_storage.create_job(metadata)
 
-        # 保存上传的文件
-        file_content = await file.read()
+        # 保存上传的文件（线程池中流式写入，不阻塞事件循环）
         file_path = job.job_dir / file.filename
-        save_uploaded_file(file_content, file_path)
+        size = await run_in_threadpool(save_uploaded_file, file, file_path)
 
-        # 提取视频信息
-        video_info = extract_video_info(file_path)
+        # 提取视频信息（大小直接取自写入字节数）
+        video_info = extract_video_info_from_upload(file_path.name, size)
         metadata.reference_video = video_info
 
         # 更新元数据
@@ -101,28 +130,23 @@ async def create_job(
         # 创建任务
         job = job_storage.create_job(metadata)
 
-        # 保存参考视频
-        reference_content = await reference.read()
-        reference_path = job.job_dir / reference.filename
-        save_uploaded_file(reference_content, reference_path)
-        metadata.reference_video = extract_video_info(reference_path)
-
-        # 保存待测视频
-        distorted_content = await distorted.read()
-        distorted_path = job.job_dir / distorted.filename
-        save_uploaded_file(distorted_content, distorted_path)
-        metadata.distorted_video = extract_video_info(distorted_path)
+        # 并发保存参考视频与待测视频：先确定两个互不相同的目标路径，
+        # 同名上传时待测视频改用带序号的文件名，避免两路并发写入同一文件
+        reference_dest = _unique_destination(job.job_dir, reference.filename or "reference")
+        reference_dest.touch()
+        distorted_dest = _unique_destination(job.job_dir, distorted.filename or "distorted")
+        (reference_path, reference_size), (distorted_path, distorted_size) = await asyncio.gather(
+            _ingest(reference, reference_dest),
+            _ingest(distorted, distorted_dest),
+        )
+        metadata.reference_video = extract_video_info_from_upload(reference_path.name, reference_size)
+        metadata.distorted_video = extract_video_info_from_upload(distorted_path.name, distorted_size)
 
         # 更新元数据
         job_storage.update_job(job)
 
     # 返回响应
-    return CreateJobResponse(
-        job_id=metadata.job_id,
-        status=metadata.status,
-        mode=metadata.mode,
-        created_at=metadata.created_at,
-    )
+    return _created_response(metadata)
 
 
 @router.get(
@@ -130,7 +154,7 @@ async def create_job(
     response_model=JobDetailResponse,
     responses={404: {"model": ErrorResponse}},
 )
-async def get_job(job_id: str) -> JobDetailResponse:
+async def get_job(request: Request, response: Response, job_id: str) -> JobDetailResponse:
     """
     获取任务详情
 
@@ -143,6 +167,12 @@ async def get_job(job_id: str) -> JobDetailResponse:
 
     metadata = job.metadata
 
+    # 元数据每次更新都会刷新 updated_at，可直接作为 ETag
+    etag = f'W/"{metadata.updated_at.timestamp()}"'
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+
     return JobDetailResponse(
         job_id=metadata.job_id,
         status=metadata.status,
@@ -164,28 +194,27 @@ async def get_job(job_id: str) -> JobDetailResponse:
     )
 
 
-@router.get("", response_model=List[JobListItem])
+@router.get("", response_model=List[JobListItem], response_class=ORJSONResponse)
 async def list_jobs(
+    request: Request,
     status: Optional[JobStatus] = None,
     limit: Optional[int] = None,
-) -> List[JobListItem]:
+) -> Response:
     """
     列出所有任务
 
     - **status**: 可选的状态过滤
     - **limit**: 可选的数量限制
     """
-    jobs = job_storage.list_jobs(status=status, limit=limit)
-
-    return [
-        JobListItem(
-            job_id=job.metadata.job_id,
-            status=job.metadata.status,
-            mode=job.metadata.mode,
-            created_at=job.metadata.created_at,
-        )
-        for job in jobs
-    ]
+    # 任意任务变更都会改变列表版本；轮询时未变化直接返回 304
+    etag = f'W/"{job_storage.list_version()}"'
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    entries = job_storage.list_job_entries(status=status, limit=limit)
+
+    # 索引项字段与 JobListItem 一致，直接由 orjson 编码，跳过逐项 pydantic 校验
+    return ORJSONResponse([entry._asdict() for entry in entries], headers={"ETag": etag})
 
 
 def _unique_destination(directory: Path, filename: str) -> Path:
@@ -228,6 +257,7 @@ def _parse_paths_field(value: Optional[str]) -> List[Path]:
     "/bitstream",
     response_model=CreateJobResponse,
     status_code=201,
+    response_class=ORJSONResponse,
     responses={400: {"model": ErrorResponse}},
 )
 async def create_bitstream_job(
@@ -238,7 +268,7 @@ async def create_bitstream_job(
     width: Optional[int] = Form(None),
     height: Optional[int] = Form(None),
     fps: Optional[float] = Form(None),
-) -> CreateJobResponse:
+) -> Response:
     """
     创建码流分析任务（Ref + 多个 Encoded）
 
@@ -287,23 +317,25 @@ async def create_bitstream_job(
     if has_yuv and (width is None or height is None or fps is None):
         raise HTTPException(status_code=400, detail="检测到 .yuv 输入，必须填写 width/height/fps")
 
-    async def _read_upload(upload: Optional[UploadFile]) -> Optional[tuple[str, bytes]]:
-        """只接受有文件名且非空内容的上传，返回 (filename, content)。"""
+    def _valid_upload(upload: Optional[UploadFile]) -> Optional[UploadFile]:
+        """只接受有文件名且非空内容的上传（通过 seek/tell 判断大小，不读入内存）。"""
         if not upload or not upload.filename:
             return None
-        content = await upload.read()
-        if not content:
+        upload.file.seek(0, os.SEEK_END)
+        size = upload.file.tell()
+        upload.file.seek(0)
+        if not size:
             return None
-        return upload.filename, content
+        return upload
 
-    # 读取有效的上传文件（过滤掉空文件或无文件名的部分）
-    ref_upload = await _read_upload(reference_file)
-    encoded_uploads: List[tuple[str, bytes]] = []
+    # 过滤有效的上传文件（过滤掉空文件或无文件名的部分）
+    ref_upload = _valid_upload(reference_file)
+    encoded_uploads: List[UploadFile] = []
     if encoded_files:
         for upload in encoded_files:
-            data = await _read_upload(upload)
-            if data:
-                encoded_uploads.append(data)
+            valid = _valid_upload(upload)
+            if valid:
+                encoded_uploads.append(valid)
 
     if not ref_upload and not ref_path:
         raise HTTPException(status_code=400, detail="必须提供参考视频 reference_file 或 reference_path")
@@ -326,10 +358,9 @@ async def create_bitstream_job(
 
     # 保存/引用参考视频
     if ref_upload:
-        ref_filename, ref_content = ref_upload
-        ref_dest = _unique_destination(job.job_dir, ref_filename or "reference")
-        save_uploaded_file(ref_content, ref_dest)
-        metadata.reference_video = extract_video_info(ref_dest)
+        ref_dest = _unique_destination(job.job_dir, ref_upload.filename or "reference")
+        size = await run_in_threadpool(save_uploaded_file, ref_upload, ref_dest)
+        metadata.reference_video = extract_video_info_from_upload(ref_dest.name, size)
     else:
         # 直接使用原路径，不复制
         metadata.reference_video = extract_video_info(ref_path)
@@ -338,10 +369,10 @@ async def create_bitstream_job(
     encoded_infos = []
 
     if encoded_uploads:
-        for filename, content in encoded_uploads:
-            dest = _unique_destination(job.job_dir, filename or "encoded")
-            save_uploaded_file(content, dest)
-            encoded_infos.append(extract_video_info(dest))
+        for upload in encoded_uploads:
+            dest = _unique_destination(job.job_dir, upload.filename or "encoded")
+            size = await run_in_threadpool(save_uploaded_file, upload, dest)
+            encoded_infos.append(extract_video_info_from_upload(dest.name, size))
 
     for p in enc_path_list:
         # 直接引用原路径
@@ -352,12 +383,7 @@ async def create_bitstream_job(
     # 更新元数据
     job_storage.update_job(job)
 
-    return CreateJobResponse(
-        job_id=metadata.job_id,
-        status=metadata.status,
-        mode=metadata.mode,
-        created_at=metadata.created_at,
-    )
+    return _created_response(metadata)
 
 
 @router.post("/compare", response_model=dict)
@@ -3,15 +3,22 @@
 
 提供 Web 界面的 HTML 页面
 """
+import secrets
+from collections import OrderedDict
 from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional, Tuple
 
-from fastapi import APIRouter, Request
-from fastapi.responses import HTMLResponse
+import orjson
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
+from jinja2 import FileSystemBytecodeCache
+from markupsafe import Markup
 
-from src.models import JobStatus
+from src.config import settings
+from src.models import JOB_STATUS_BY_VALUE, JobMetadata, JobStatus
 from src.services import job_storage
 from src.services.template_storage import template_storage
 from src.utils.url_helpers import build_reports_base_url
@@ -19,20 +26,66 @@ from src.utils.url_helpers import build_reports_base_url
 router = APIRouter(tags=["pages"])
 
 # 配置模板
-BASE_DIR = Path(__file__).resolve().parent.parent
+BASE_DIR = Path(__file__).parent.parent
 TEMPLATES_DIR = BASE_DIR / "templates"
 templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
+# 非调试模式下不再逐次检查模板 mtime；字节码缓存让多 worker / 重启复用编译结果
+templates.env.auto_reload = settings.debug
+templates.env.trim_blocks = True
+templates.env.lstrip_blocks = True
+templates.env.bytecode_cache = FileSystemBytecodeCache()
+
+
+def _tojson(value: Any) -> Markup:
+    """orjson 版 tojson 过滤器，与 Jinja 内置版本一样转义 HTML 敏感字符"""
+    rv = orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+    return Markup(
+        rv.replace("<", "\\u003c")
+        .replace(">", "\\u003e")
+        .replace("&", "\\u0026")
+        .replace("'", "\\u0027")
+    )
+
+
+templates.env.filters["tojson"] = _tojson
+
+# 启动时预编译的页面模板
+PRELOAD_TEMPLATES = (
+    "base.html",
+    "index.html",
+    "job_report.html",
+    "jobs_list.html",
+    "templates_list.html",
+    "template_form.html",
+    "bitstream_analysis.html",
+)
+
+
+def preload_templates() -> None:
+    """预编译页面模板，避免首个请求承担编译开销"""
+    for name in PRELOAD_TEMPLATES:
+        templates.get_template(name)
+
+
+# 页面时间显示格式
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
 
 
 def _fmt_time(dt: Optional[datetime]) -> Optional[str]:
     if not dt:
         return None
+    return _fmt_time_cached(dt)
+
+
+@lru_cache(maxsize=8192)
+def _fmt_time_cached(dt: datetime) -> str:
+    """按时间值缓存格式化结果（任务时间戳写入后不变，列表页可直接复用）"""
     if dt.tzinfo is None:
         dt = dt.replace(tzinfo=timezone.utc)
     try:
-        return dt.astimezone().strftime("%Y-%m-%d %H:%M:%S")
+        return dt.astimezone().strftime(TIME_FORMAT)
     except Exception:
-        return dt.strftime("%Y-%m-%d %H:%M:%S")
+        return dt.strftime(TIME_FORMAT)
 
 
 def _not_found_response(request: Request, resource_type: str, resource_id: str) -> HTMLResponse:
@@ -53,6 +106,90 @@ def _base_context(request: Request) -> dict:
     return {"request": request, "reports_base_url": build_reports_base_url(request)}
 
 
+# 页面 ETag 前缀：每个进程不同，部署新模板后不会命中旧缓存
+_PAGE_ETAG_PREFIX = secrets.token_hex(4)
+# 页面缓存策略：浏览器短暂缓存，之后用 ETag 重新验证
+PAGE_CACHE_CONTROL = "private, max-age=5"
+
+
+def _page_etag(version: str) -> str:
+    return f'W/"{_PAGE_ETAG_PREFIX}-{version}"'
+
+
+def _not_modified_response(request: Request, etag: str) -> Optional[Response]:
+    """客户端缓存仍有效时返回 304 响应，否则返回 None"""
+    if request.headers.get("if-none-match") != etag:
+        return None
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": PAGE_CACHE_CONTROL})
+
+
+# 流式渲染时每次发送的 Jinja 输出片段数
+STREAM_BUFFER_SIZE = 64
+
+
+def _stream_template(name: str, context: dict) -> StreamingResponse:
+    """流式渲染模板：边渲染边发送，缩短首字节时间"""
+    stream = templates.get_template(name).stream(context)
+    stream.enable_buffering(STREAM_BUFFER_SIZE)
+    return StreamingResponse(stream, media_type="text/html")
+
+
+# 任务报告页渲染数据缓存：元数据每次更新都会刷新 updated_at，以 (job_id, updated_at) 为键即可失效
+JOB_CONTEXT_CACHE_SIZE = 256
+_job_context_cache: "OrderedDict[Tuple[str, datetime], dict]" = OrderedDict()
+
+# 空序列占位（只读，供模板迭代）
+_EMPTY: tuple = ()
+
+# 报告页直接使用的元数据字段（其余字段由 _job_context 派生）
+_JOB_CONTEXT_FIELDS = {
+    "job_id",
+    "status",
+    "mode",
+    "template_name",
+    "preset",
+    "metrics",
+    "error_message",
+    "template_a_id",
+    "template_b_id",
+    "comparison_result",
+    "execution_result",
+    "command_logs",
+}
+
+
+def _job_context(metadata: JobMetadata) -> dict:
+    """构造任务报告页的 job 数据（按更新时间缓存）"""
+    key = (metadata.job_id, metadata.updated_at)
+    cached = _job_context_cache.get(key)
+    if cached is not None:
+        _job_context_cache.move_to_end(key)
+        return cached
+
+    # 一次 model_dump(mode="json") 完成枚举/嵌套模型/命令记录的序列化，再补充派生字段
+    job_context = metadata.model_dump(mode="json", include=_JOB_CONTEXT_FIELDS)
+    job_context.update(
+        {
+            "created_at": _fmt_time(metadata.created_at),
+            "updated_at": _fmt_time(metadata.updated_at),
+            "completed_at": _fmt_time(metadata.completed_at),
+            "reference_filename": (
+                metadata.reference_video.filename if metadata.reference_video else None
+            ),
+            "distorted_filename": (
+                metadata.distorted_video.filename if metadata.distorted_video else None
+            ),
+            "encoded_filenames": (
+                [v.filename for v in metadata.encoded_videos] if metadata.encoded_videos else _EMPTY
+            ),
+        }
+    )
+    _job_context_cache[key] = job_context
+    if len(_job_context_cache) > JOB_CONTEXT_CACHE_SIZE:
+        _job_context_cache.popitem(last=False)
+    return job_context
+
+
 @router.get("/jobs/{job_id}", response_class=HTMLResponse)
 async def job_report_page(request: Request, job_id: str) -> HTMLResponse:
     """任务报告页面"""
@@ -61,65 +198,48 @@ async def job_report_page(request: Request, job_id: str) -> HTMLResponse:
     if not job:
         return _not_found_response(request, "Job", job_id)
 
-    metadata = job.metadata
+    # 元数据未变化时直接返回 304，跳过上下文构造和渲染
+    etag = _page_etag(f"{job.job_id}-{job.metadata.updated_at.timestamp()}")
+    not_modified = _not_modified_response(request, etag)
+    if not_modified is not None:
+        return not_modified
 
     # 准备模板数据
     context = _base_context(request)
-    context["job"] = {
-        "job_id": metadata.job_id,
-        "status": metadata.status.value,
-        "mode": metadata.mode.value,
-        "created_at": _fmt_time(metadata.created_at),
-        "updated_at": _fmt_time(metadata.updated_at),
-        "completed_at": _fmt_time(metadata.completed_at),
-        "template_name": metadata.template_name,
-        "reference_filename": (
-            metadata.reference_video.filename if metadata.reference_video else None
-        ),
-        "distorted_filename": (
-            metadata.distorted_video.filename if metadata.distorted_video else None
-        ),
-        "encoded_filenames": [v.filename for v in (metadata.encoded_videos or [])],
-        "preset": metadata.preset,
-        "metrics": metadata.metrics,
-        "error_message": metadata.error_message,
-        "template_a_id": metadata.template_a_id,
-        "template_b_id": metadata.template_b_id,
-        "comparison_result": metadata.comparison_result,
-        "execution_result": metadata.execution_result,
-        "command_logs": [
-            {
-                "command_id": cmd.command_id,
-                "command_type": cmd.command_type,
-                "command": cmd.command,
-                "status": cmd.status.value,
-                "source_file": cmd.source_file,
-                "started_at": cmd.started_at.isoformat() if cmd.started_at else None,
-                "completed_at": cmd.completed_at.isoformat() if cmd.completed_at else None,
-                "error_message": cmd.error_message,
-            }
-            for cmd in metadata.command_logs
-        ],
-    }
-
-    return templates.TemplateResponse("job_report.html", context)
+    context["job"] = _job_context(job.metadata)
+
+    response = templates.TemplateResponse("job_report.html", context)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = PAGE_CACHE_CONTROL
+    return response
+
+
+# 任务列表页默认每页数量
+JOBS_PAGE_SIZE = 50
+
+
+def parse_status_filter(status: Optional[str] = None) -> Optional[JobStatus]:
+    """解析状态筛选参数（无效值视为不筛选）"""
+    return JOB_STATUS_BY_VALUE.get(status) if status else None
 
 
 @router.get("/jobs", response_class=HTMLResponse)
 async def jobs_list_page(
-    request: Request, status: Optional[str] = None
+    request: Request,
+    filter_status: Optional[JobStatus] = Depends(parse_status_filter),
+    limit: int = Query(JOBS_PAGE_SIZE, ge=1, le=500),
+    offset: int = Query(0, ge=0),
 ) -> HTMLResponse:
-    """任务列表页面"""
-    # 解析状态过滤
-    filter_status = None
-    if status:
-        try:
-            filter_status = JobStatus(status)
-        except ValueError:
-            pass
+    """任务列表页面（分页）"""
+    # 任意任务变更都会改变列表版本（不同筛选/分页参数对应不同 URL，各自缓存）
+    etag = _page_etag(job_storage.list_version())
+    not_modified = _not_modified_response(request, etag)
+    if not_modified is not None:
+        return not_modified
 
     # 获取任务列表
-    jobs = job_storage.list_jobs(status=filter_status)
+    jobs = job_storage.list_jobs(status=filter_status, limit=limit, offset=offset)
+    total_count = job_storage.count_jobs(status=filter_status)
 
     # 准备模板数据
     jobs_data = [
@@ -135,8 +255,21 @@ async def jobs_list_page(
     ]
 
     context = _base_context(request)
-    context.update({"jobs": jobs_data, "status": status})
-    return templates.TemplateResponse("jobs_list.html", context)
+    context.update(
+        {
+            "jobs": jobs_data,
+            "status": filter_status.value if filter_status else None,
+            "total_count": total_count,
+            "page": offset // limit + 1,
+            "page_size": limit,
+            "prev_offset": max(offset - limit, 0) if offset > 0 else None,
+            "next_offset": offset + limit if offset + limit < total_count else None,
+        }
+    )
+    response = templates.TemplateResponse("jobs_list.html", context)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = PAGE_CACHE_CONTROL
+    return response
 
 
 @router.get("/templates", response_class=HTMLResponse)
@@ -150,7 +283,7 @@ async def create_template_page(request: Request) -> HTMLResponse:
     """创建新模板页面"""
     context = _base_context(request)
     context.update({"template_id": None, "readonly": False})
-    return templates.TemplateResponse("template_form.html", context)
+    return _stream_template("template_form.html", context)
 
 
 @router.get("/templates/{template_id}", response_class=HTMLResponse)
@@ -163,7 +296,7 @@ async def template_detail_page(request: Request, template_id: str) -> HTMLRespon
 
     context = _base_context(request)
     context.update({"template_id": template_id, "readonly": True})
-    return templates.TemplateResponse("template_form.html", context)
+    return _stream_template("template_form.html", context)
 
 
 @router.get("/templates/{template_id}/edit", response_class=HTMLResponse)
@@ -176,7 +309,7 @@ async def edit_template_page(request: Request, template_id: str) -> HTMLResponse
 
     context = _base_context(request)
     context.update({"template_id": template_id, "readonly": False})
-    return templates.TemplateResponse("template_form.html", context)
+    return _stream_template("template_form.html", context)
 
 
 @router.get("/templates/{template_id}/view", response_class=HTMLResponse)
@@ -272,12 +272,12 @@ async def execute_template(
         job_storage.update_job(job)
 
     # 添加命令日志
-    def add_command_log(command_type: str, command: str, source_file: str = None) -> str:
+    def add_command_log(command_type: str, cmd: List[str], source_file: str = None) -> str:
         command_id = generate(size=8)
         cmd_log = CommandLog(
             command_id=command_id,
             command_type=command_type,
-            command=command,
+            command=" ".join(cmd),
             status=CommandStatus.PENDING,
             source_file=source_file,
         )
@@ -26,10 +26,15 @@ class Settings(BaseSettings):
     # FFmpeg 配置
     ffmpeg_path: Optional[str] = None  # FFmpeg 目录路径，如 /usr/local/ffmpeg/bin
     ffmpeg_timeout: int = 600
+    # 单侧 Metrics 分析的并行编码数，0 表示按物理核数 / 4 自动计算
+    encode_parallelism: int = 0
 
     # 日志配置
     log_level: str = "INFO"
 
+    # 调试模式（开启后模板修改即时生效）
+    debug: bool = False
+
     model_config = SettingsConfigDict(
         env_prefix="VMA_",
         env_file=".env",
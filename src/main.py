@@ -8,9 +8,9 @@ from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI, Request
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
 
 from src.utils.url_helpers import build_reports_base_url
 from src.api import (
@@ -19,6 +19,7 @@ from src.api import (
     pages_router,
     templates_router,
 )
+from src.api.pages import preload_templates, templates
 from src.config import settings
 from src.services import task_processor
 
@@ -27,7 +28,8 @@ from src.services import task_processor
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """应用生命周期管理器"""
-    # 启动时：启动后台任务处理器
+    # 启动时：预编译页面模板，并启动后台任务处理器
+    preload_templates()
     task = asyncio.create_task(task_processor.start_background_processor())
     yield
     # 关闭时：停止后台任务处理器
@@ -45,25 +47,23 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# 压缩较大的响应体（任务列表/详情 JSON、报告页面）
+app.add_middleware(GZipMiddleware, minimum_size=512)
+
 # 注册 API 路由
 app.include_router(jobs_router)
 app.include_router(pages_router)
 app.include_router(templates_router)
 app.include_router(metrics_analysis_router)
 
-# 配置静态文件和模板
-BASE_DIR = Path(__file__).resolve().parent
+# 配置静态文件
+BASE_DIR = Path(__file__).parent
 STATIC_DIR = BASE_DIR / "static"
-TEMPLATES_DIR = BASE_DIR / "templates"
 
 # 挂载静态文件目录（如果存在）
 if STATIC_DIR.exists():
     app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
 
-# 配置 Jinja2 模板
-templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
-
-
 @app.get("/", response_class=HTMLResponse)
 async def root(request: Request) -> HTMLResponse:
     """根路径，返回首页"""
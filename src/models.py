@@ -31,6 +31,11 @@ class JobMode(str, Enum):
     METRICS_ANALYSIS = "metrics_analysis"  # 单侧 Metrics 分析模板
 
 
+# 枚举值 -> 枚举成员查找表（解析请求参数时避免异常路径）
+JOB_STATUS_BY_VALUE = {s.value: s for s in JobStatus}
+JOB_MODE_BY_VALUE = {m.value: m for m in JobMode}
+
+
 class CommandStatus(str, Enum):
     """命令执行状态"""
 
@@ -3,12 +3,17 @@
 
 允许破坏式重构：仅保留当前需求相关的字段。
 """
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
 from pathlib import Path
 from typing import List, Optional
 
-from pydantic import BaseModel, ConfigDict, Field, model_validator
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, ValidationInfo, field_validator, model_validator
+
+
+def utc_now() -> datetime:
+    """当前 UTC 时间（带时区）"""
+    return datetime.now(timezone.utc)
 
 
 class EncoderType(str, Enum):
@@ -42,8 +47,9 @@ class TemplateSideConfig(BaseModel):
     model_config = ConfigDict(extra="ignore")
 
     @model_validator(mode="after")
-    def validate_fields(self) -> "TemplateSideConfig":
-        ctx = getattr(self, "__pydantic_context__", {}) or {}
+    def validate_fields(self, info: ValidationInfo) -> "TemplateSideConfig":
+        # 从磁盘加载已持久化的模板时通过 context 跳过目录存在性检查（避免逐个 stat）
+        ctx = info.context or {}
         skip_path_check = ctx.get("skip_path_check")
         if not self.source_dir.strip():
             raise ValueError("source_dir 不能为空")
@@ -79,14 +85,20 @@ class EncodingTemplateMetadata(BaseModel):
     anchor_computed: bool = Field(default=False, description="Anchor 是否已计算完成")
     anchor_fingerprint: Optional[str] = Field(None, description="Anchor 配置指纹，用于变更检测")
 
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=utc_now)
+    updated_at: datetime = Field(default_factory=utc_now)
 
     model_config = ConfigDict(
         extra="ignore",
         json_encoders={datetime: lambda v: v.isoformat()},
     )
 
+    @field_validator("created_at", "updated_at")
+    @classmethod
+    def ensure_utc(cls, v: datetime) -> datetime:
+        # 旧版本持久化的时间为 naive UTC，统一补上时区，避免与新数据混合比较时报错
+        return v if v.tzinfo is not None else v.replace(tzinfo=timezone.utc)
+
     @model_validator(mode="after")
     def validate_by_type(self) -> "EncodingTemplateMetadata":
         if self.template_type == TemplateType.COMPARISON:
@@ -100,6 +112,10 @@ class EncodingTemplateMetadata(BaseModel):
         return self
 
 
+# 批量校验模板元数据（一次进入 pydantic-core 处理 N 个模板）
+TEMPLATE_LIST_ADAPTER = TypeAdapter(List[EncodingTemplateMetadata])
+
+
 class EncodingTemplate(BaseModel):
     """模板对象（包含所在目录）"""
 
@@ -4,48 +4,72 @@ Metrics 分析任务对比（选择两个 Metrics 分析任务，实时生成对
 
 from __future__ import annotations
 
-import json
 import sys
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
-import plotly.graph_objects as go
 import streamlit as st
 
 # 添加项目根目录到Python路径
 project_root = Path(__file__).resolve().parents[2]
 sys.path.insert(0, str(project_root))
 
-from src.utils.bd_rate import bd_rate as _bd_rate, bd_metrics as _bd_metrics
+from src.utils.bd_rate import bd_rate_and_metrics as _bd_rate_and_metrics
 from src.utils.streamlit_helpers import (
     jobs_root_dir as _jobs_root_dir,
     list_jobs,
     load_json_report,
-    parse_rate_point as _parse_point,
+    report_version,
+    cpu_samples_array,
+    pct_change,
+    build_table_view,
+    parse_rate_points,
+    merge_anchor_test,
+    METRICS_MERGE_KEYS,
+    METRICS_MERGE_COLUMNS,
     format_env_info,
     render_overall_section,
 )
 from src.services.template_storage import template_storage
 
 
-def _list_metrics_jobs(limit: int = 100) -> List[Dict[str, Any]]:
-    return list_jobs("metrics_analysis/analyse_data.json", limit=limit, check_status=True)
+ANALYSE_DATA_PATH = "metrics_analysis/analyse_data.json"
 
 
-def _load_analyse(job_id: str) -> Dict[str, Any]:
-    return load_json_report(job_id, "metrics_analysis/analyse_data.json")
+@st.cache_data(ttl=10, show_spinner=False)
+def _list_metrics_job_options(limit: int = 100) -> Tuple[int, Tuple[str, ...]]:
+    """
+    返回 (任务总数, 已完成任务 ID)，短时缓存避免每次交互重跑都扫描任务目录。
+    只缓存任务 ID，不缓存 list_jobs 附带的完整报告数据。
+    """
+    jobs = list_jobs(ANALYSE_DATA_PATH, limit=limit, check_status=True)
+    return len(jobs), tuple(j["job_id"] for j in jobs if j["status_ok"])
 
 
-def _metric_value(metrics: Dict[str, Any], name: str, field: str) -> Optional[float]:
-    block = metrics.get(name) or {}
-    if not isinstance(block, dict):
-        return None
-    summary = block.get("summary") or {}
-    if isinstance(summary, dict) and field in summary:
-        return summary.get(field)
-    return block.get(field)
+@st.cache_data(show_spinner=False)
+def _load_analyse_cached(job_id: str, version: int) -> Dict[str, Any]:
+    return load_json_report(job_id, ANALYSE_DATA_PATH)
+
+
+def _column(frame: pd.DataFrame, name: str) -> pd.Series:
+    """取扁平化后的列，缺失时返回全空列"""
+    if name in frame.columns:
+        return frame[name]
+    return pd.Series(np.nan, index=frame.index, dtype="object")
+
+
+def _metric_column(frame: pd.DataFrame, name: str, field: str) -> pd.Series:
+    """优先取 metrics.<name>.summary.<field>，缺失时回退到 metrics.<name>.<field>"""
+    return _column(frame, f"metrics.{name}.summary.{field}").combine_first(
+        _column(frame, f"metrics.{name}.{field}")
+    )
+
+
+def _or(primary: pd.Series, fallback: pd.Series) -> pd.Series:
+    """逐元素等价于 primary or fallback（0 / 空值视为假）"""
+    return primary.where(primary.fillna(0).astype(bool), fallback)
 
 
 def _format_points(points: Optional[List[float]]) -> str:
@@ -69,18 +93,24 @@ def _format_encoder_params(encoder_params: Optional[str]) -> str:
     return encoder_params or "-"
 
 
+@st.cache_data(show_spinner=False, ttl=300)
+def _get_template_info_cached(template_id: str) -> Dict[str, Any]:
+    """缓存模板中的报告信息字段（页面每次交互都会重跑，避免重复读取模板文件）"""
+    template = template_storage.get_template(template_id)
+    if not template:
+        return {}
+    anchor = template.metadata.anchor
+    return {
+        "source_dir": anchor.source_dir,
+        "encoder_type": anchor.encoder_type,
+        "encoder_params": anchor.encoder_params,
+        "bitrate_points": anchor.bitrate_points,
+    }
+
+
 def _get_report_info(data: Dict[str, Any]) -> Dict[str, Any]:
     template_id = data.get("template_id")
-    template = template_storage.get_template(template_id) if template_id else None
-    template_info: Dict[str, Any] = {}
-    if template:
-        anchor = template.metadata.anchor
-        template_info = {
-            "source_dir": anchor.source_dir,
-            "encoder_type": anchor.encoder_type,
-            "encoder_params": anchor.encoder_params,
-            "bitrate_points": anchor.bitrate_points,
-        }
+    template_info = _get_template_info_cached(template_id) if template_id else {}
     return {
         "source_dir": template_info.get("source_dir") or data.get("source_dir") or "-",
         "encoder_type": template_info.get("encoder_type") or data.get("encoder_type"),
@@ -89,106 +119,157 @@ def _get_report_info(data: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
-def _build_rows(data: Dict[str, Any], side_label: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
-    """构建指标数据行和性能数据行"""
-    rows: List[Dict[str, Any]] = []
-    perf_rows: List[Dict[str, Any]] = []
-    entries = data.get("entries") or []
-    for entry in entries:
-        video = entry.get("source")
-        for item in entry.get("encoded") or []:
-            rc, val = _parse_point(item.get("label", ""))
-            metrics = item.get("metrics") or {}
-            rows.append(
-                {
-                    "Video": video,
-                    "Side": side_label,
-                    "RC": rc,
-                    "Point": val,
-                    "Bitrate_kbps": ((item.get("bitrate") or {}).get("avg_bitrate_bps") or item.get("avg_bitrate_bps") or 0) / 1000,
-                    "PSNR": _metric_value(metrics, "psnr", "psnr_avg"),
-                    "SSIM": _metric_value(metrics, "ssim", "ssim_avg"),
-                    "VMAF": _metric_value(metrics, "vmaf", "vmaf_mean"),
-                    "VMAF-NEG": _metric_value(metrics, "vmaf_neg", "vmaf_neg_mean") or _metric_value(metrics, "vmaf", "vmaf_neg_mean"),
-                }
-            )
-            # 提取性能数据
-            perf = item.get("performance") or {}
-            if perf:
-                perf_rows.append({
-                    "Video": video,
-                    "Side": side_label,
-                    "Point": val,
-                    "FPS": perf.get("encoding_fps"),
-                    "CPU Avg(%)": perf.get("cpu_avg_percent"),
-                    "CPU Max(%)": perf.get("cpu_max_percent"),
-                    "Total Time(s)": perf.get("total_encoding_time_s"),
-                    "Frames": perf.get("total_frames"),
-                    "cpu_samples": perf.get("cpu_samples", []),
-                })
-    return rows, perf_rows
-
-
-def _build_bd_rows(df: pd.DataFrame) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
-    bd_rate_rows: List[Dict[str, Any]] = []
-    bd_metric_rows: List[Dict[str, Any]] = []
-    grouped = df.groupby("Video")
-    for video, g in grouped:
-        anchor = g[g["Side"] == "Anchor"]
-        test = g[g["Side"] == "Test"]
-        if anchor.empty or test.empty:
-            continue
-        merge = anchor.merge(test, on=["Video", "RC", "Point"], suffixes=("_anchor", "_test"))
-        if merge.empty:
+def _build_rows(data: Dict[str, Any], side_label: str) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, Any]]:
+    """构建指标数据表、性能数据表及点位/视频汇总信息（json_normalize 一次扁平化，按列计算）"""
+    entries = [
+        {"source": entry.get("source"), "encoded": entry.get("encoded") or []}
+        for entry in data.get("entries") or []
+    ]
+    items = pd.json_normalize(entries, record_path="encoded", meta=["source"])
+
+    # label 形如 <name>_<rc>_<point>.<ext>
+    rcs, points = parse_rate_points(_column(items, "label"))
+    bitrate = _or(
+        _or(_column(items, "bitrate.avg_bitrate_bps"), _column(items, "avg_bitrate_bps")),
+        pd.Series(0, index=items.index),
+    )
+
+    rows = pd.DataFrame(
+        {
+            "Video": _column(items, "source"),
+            "Side": side_label,
+            "RC": rcs,
+            "Point": points,
+            "Bitrate_kbps": pd.to_numeric(bitrate, errors="coerce") / 1000,
+            "PSNR": _metric_column(items, "psnr", "psnr_avg"),
+            "SSIM": _metric_column(items, "ssim", "ssim_avg"),
+            "VMAF": _metric_column(items, "vmaf", "vmaf_mean"),
+            "VMAF-NEG": _or(
+                _metric_column(items, "vmaf_neg", "vmaf_neg_mean"),
+                _metric_column(items, "vmaf", "vmaf_neg_mean"),
+            ),
+        },
+        index=items.index,
+    )
+
+    # 提取性能数据：仅保留带 performance 字段的编码结果
+    perf_cols = [c for c in items.columns if c.startswith("performance.")]
+    has_perf = items[perf_cols].notna().any(axis=1) if perf_cols else pd.Series(False, index=items.index)
+    perf_items = items[has_perf]
+    cpu_samples = _column(perf_items, "performance.cpu_samples").map(cpu_samples_array)
+    perf_rows = pd.DataFrame(
+        {
+            "Video": _column(perf_items, "source"),
+            "Side": side_label,
+            "Point": points[has_perf],
+            "FPS": _column(perf_items, "performance.encoding_fps"),
+            "CPU Avg(%)": _column(perf_items, "performance.cpu_avg_percent"),
+            "CPU Max(%)": _column(perf_items, "performance.cpu_max_percent"),
+            "Total Time(s)": _column(perf_items, "performance.total_encoding_time_s"),
+            "Frames": _column(perf_items, "performance.total_frames"),
+        },
+        index=perf_items.index,
+    )
+    # CPU 采样数组不放入 DataFrame，按 (Video, Point, Side) 单独存放
+    cpu_samples_map = {
+        (video, point, side_label): samples
+        for video, point, samples in zip(perf_rows["Video"], perf_rows["Point"], cpu_samples)
+    }
+    meta = {
+        "unique_points": set(points.dropna().unique().tolist()),
+        "videos": set(rows["Video"].dropna().unique().tolist()),
+        "cpu_samples": cpu_samples_map,
+    }
+    return rows.reset_index(drop=True), perf_rows.reset_index(drop=True), meta
+
+
+@st.cache_data(show_spinner=False)
+def _build_rows_cached(
+    job_id: str, version: int, side_label: str
+) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, Any]]:
+    """按任务 ID + 报告版本缓存数据行（避免对 data 字典做哈希）"""
+    return _build_rows(_load_analyse_cached(job_id, version), side_label)
+
+
+# BD 结果字段 -> 表格列名（Overall 直接使用字段名，BD-Rate / BD-Metrics 表格按列名展示）
+BD_RATE_COLUMNS = {
+    "source": "Video",
+    "bd_rate_psnr": "BD-Rate PSNR (%)",
+    "bd_rate_ssim": "BD-Rate SSIM (%)",
+    "bd_rate_vmaf": "BD-Rate VMAF (%)",
+    "bd_rate_vmaf_neg": "BD-Rate VMAF-NEG (%)",
+}
+BD_METRIC_COLUMNS = {
+    "source": "Video",
+    "bd_psnr": "BD PSNR",
+    "bd_ssim": "BD SSIM",
+    "bd_vmaf": "BD VMAF",
+    "bd_vmaf_neg": "BD VMAF-NEG",
+}
+# bd_rate / bd_metrics 至少需要 4 个点位
+BD_MIN_POINTS = 4
+BD_METRICS = ("PSNR", "SSIM", "VMAF", "VMAF-NEG")
+# 列顺序：Anchor 码率、Test 码率、各指标 Anchor 值、各指标 Test 值
+_BD_ARRAY_COLUMNS = [
+    "Bitrate_kbps_anchor",
+    "Bitrate_kbps_test",
+    *(f"{m}_anchor" for m in BD_METRICS),
+    *(f"{m}_test" for m in BD_METRICS),
+]
+_EMPTY_BD_VALUES = dict.fromkeys(k for k in (*BD_RATE_COLUMNS, *BD_METRIC_COLUMNS) if k != "source")
+
+
+def _build_bd_rows(merged: pd.DataFrame) -> List[Dict[str, Any]]:
+    """基于 Anchor/Test 全局合并结果，逐视频计算 BD-Rate 与 BD-Metrics（同一行包含两类结果）"""
+    bd_rows: List[Dict[str, Any]] = []
+    for video, g in merged.groupby("Video", sort=False, observed=True):
+        if len(g) < BD_MIN_POINTS:
+            # 点位不足时 BD 计算必然返回 None，跳过逐指标的筛选与拟合
+            bd_rows.append({"source": video, **_EMPTY_BD_VALUES})
             continue
-        def _collect(col_anchor: str, col_test: str) -> Tuple[List[float], List[float], List[float], List[float]]:
-            merged = merge.dropna(subset=[col_anchor, col_test, "Bitrate_kbps_anchor", "Bitrate_kbps_test"])
-            if merged.empty:
-                return [], [], [], []
-            return (
-                merged["Bitrate_kbps_anchor"].tolist(),
-                merged[col_anchor].tolist(),
-                merged["Bitrate_kbps_test"].tolist(),
-                merged[col_test].tolist(),
-            )
-
-        anchor_rates, anchor_psnr, test_rates, test_psnr = _collect("PSNR_anchor", "PSNR_test")
-        _, anchor_ssim, _, test_ssim = _collect("SSIM_anchor", "SSIM_test")
-        _, anchor_vmaf, _, test_vmaf = _collect("VMAF_anchor", "VMAF_test")
-        _, anchor_vn, _, test_vn = _collect("VMAF-NEG_anchor", "VMAF-NEG_test")
-        # BD-Rate
-        bd_rate_rows.append(
-            {
-                "Video": video,
-                "BD-Rate PSNR (%)": _bd_rate(anchor_rates, anchor_psnr, test_rates, test_psnr),
-                "BD-Rate SSIM (%)": _bd_rate(anchor_rates, anchor_ssim, test_rates, test_ssim),
-                "BD-Rate VMAF (%)": _bd_rate(anchor_rates, anchor_vmaf, test_rates, test_vmaf),
-                "BD-Rate VMAF-NEG (%)": _bd_rate(anchor_rates, anchor_vn, test_rates, test_vn),
-            }
-        )
-        # BD-Metrics
-        bd_metric_rows.append(
+
+        # 一次性取出码率与四项指标，按指标组合各自的有效行掩码
+        arr = g[_BD_ARRAY_COLUMNS].to_numpy(dtype=float, na_value=np.nan)
+        valid = ~np.isnan(arr)
+        rates_valid = valid[:, 0] & valid[:, 1]
+        collected = []
+        for i in range(len(BD_METRICS)):
+            col_anchor, col_test = 2 + i, 2 + len(BD_METRICS) + i
+            mask = rates_valid & valid[:, col_anchor] & valid[:, col_test]
+            collected.append((arr[mask, 0], arr[mask, col_anchor], arr[mask, 1], arr[mask, col_test]))
+
+        # 码率统一取 PSNR 有效行，指标取各自有效行
+        anchor_rates, _, test_rates, _ = collected[0]
+        results = [
+            _bd_rate_and_metrics(anchor_rates, anchor_metric, test_rates, test_metric)
+            for _, anchor_metric, _, test_metric in collected
+        ]
+        (rate_psnr, m_psnr), (rate_ssim, m_ssim), (rate_vmaf, m_vmaf), (rate_vn, m_vn) = results
+        bd_rows.append(
             {
-                "Video": video,
-                "BD PSNR": _bd_metrics(anchor_rates, anchor_psnr, test_rates, test_psnr),
-                "BD SSIM": _bd_metrics(anchor_rates, anchor_ssim, test_rates, test_ssim),
-                "BD VMAF": _bd_metrics(anchor_rates, anchor_vmaf, test_rates, test_vmaf),
-                "BD VMAF-NEG": _bd_metrics(anchor_rates, anchor_vn, test_rates, test_vn),
+                "source": video,
+                "bd_rate_psnr": rate_psnr,
+                "bd_rate_ssim": rate_ssim,
+                "bd_rate_vmaf": rate_vmaf,
+                "bd_rate_vmaf_neg": rate_vn,
+                "bd_psnr": m_psnr,
+                "bd_ssim": m_ssim,
+                "bd_vmaf": m_vmaf,
+                "bd_vmaf_neg": m_vn,
             }
         )
-    return bd_rate_rows, bd_metric_rows
+    return bd_rows
 
 
 st.set_page_config(page_title="Metrics分析", page_icon="📊", layout="wide")
 
 st.markdown("<h1 style='text-align:center;'>📊 Metrics分析</h1>", unsafe_allow_html=True)
 
-jobs = _list_metrics_jobs()
-if len(jobs) < 2:
+job_count, options = _list_metrics_job_options()
+if job_count < 2:
     st.info("需要至少两个已完成的Metrics分析任务")
     st.stop()
 
-options = [j["job_id"] for j in jobs if j["status_ok"]]
 if len(options) < 2:
     st.info("任务数量不足，无法进行分析。")
     st.stop()
@@ -202,21 +283,29 @@ with col2:
 if not anchor_job_id or not test_job_id:
     st.stop()
 
-anchor_data = _load_analyse(anchor_job_id)
-test_data = _load_analyse(test_job_id)
+anchor_version = report_version(anchor_job_id, ANALYSE_DATA_PATH)
+test_version = report_version(test_job_id, ANALYSE_DATA_PATH)
+anchor_data = _load_analyse_cached(anchor_job_id, anchor_version)
+test_data = _load_analyse_cached(test_job_id, test_version)
 
-anchor_rows, anchor_perf_rows = _build_rows(anchor_data, "Anchor")
-test_rows, test_perf_rows = _build_rows(test_data, "Test")
-rows = anchor_rows + test_rows
-perf_rows = anchor_perf_rows + test_perf_rows
-df = pd.DataFrame(rows)
+anchor_rows, anchor_perf_rows, anchor_meta = _build_rows_cached(anchor_job_id, anchor_version, "Anchor")
+test_rows, test_perf_rows, test_meta = _build_rows_cached(test_job_id, test_version, "Test")
+# 一次性排序，后续的合并 / 明细表沿用该顺序，不再重复排序
+df = pd.concat([anchor_rows, test_rows], ignore_index=True)
+df_perf = pd.concat([anchor_perf_rows, test_perf_rows], ignore_index=True)
 if df.empty:
     st.warning("没有可用于对比的指标数据。")
     st.stop()
 
-df = df.sort_values(by=["Video", "RC", "Point", "Side"])
-point_count = df["Point"].dropna().nunique()
-has_bd = point_count >= 4
+df = df.sort_values(by=["Video", "RC", "Point", "Side"]).reset_index(drop=True)
+if not df_perf.empty:
+    df_perf = df_perf.sort_values(by=["Video", "Point", "Side"]).reset_index(drop=True)
+
+# 低基数字符串列转为 category，后续 merge / groupby 基于整数编码
+df = df.astype({"Video": "category", "Side": "category", "RC": "category"})
+if not df_perf.empty:
+    df_perf = df_perf.astype({"Video": "category", "Side": "category"})
+has_bd = len(anchor_meta["unique_points"] | test_meta["unique_points"]) >= 4
 
 # ========== 侧边栏目录 ==========
 with st.sidebar:
@@ -267,36 +356,20 @@ info_df = pd.DataFrame(
 )
 st.dataframe(info_df, use_container_width=True, hide_index=True)
 
-bd_list_for_overall: List[Dict[str, Any]] = []
-bd_rate_rows: List[Dict[str, Any]] = []
-bd_metric_rows: List[Dict[str, Any]] = []
-if has_bd:
-    bd_rate_rows, bd_metric_rows = _build_bd_rows(df)
-    if bd_rate_rows and bd_metric_rows:
-        for i, rate_row in enumerate(bd_rate_rows):
-            metric_row = bd_metric_rows[i] if i < len(bd_metric_rows) else {}
-            bd_list_for_overall.append({
-                "source": rate_row.get("Video"),
-                "bd_rate_psnr": rate_row.get("BD-Rate PSNR (%)"),
-                "bd_rate_ssim": rate_row.get("BD-Rate SSIM (%)"),
-                "bd_rate_vmaf": rate_row.get("BD-Rate VMAF (%)"),
-                "bd_rate_vmaf_neg": rate_row.get("BD-Rate VMAF-NEG (%)"),
-                "bd_psnr": metric_row.get("BD PSNR"),
-                "bd_ssim": metric_row.get("BD SSIM"),
-                "bd_vmaf": metric_row.get("BD VMAF"),
-                "bd_vmaf_neg": metric_row.get("BD VMAF-NEG"),
-            })
+# Anchor/Test 按 (Video, RC, Point) 全局合并一次，BD 计算与 Metrics 对比表共用
+anchor_df = df[df["Side"] == "Anchor"]
+test_df = df[df["Side"] == "Test"]
+merged = merge_anchor_test(anchor_df, test_df, METRICS_MERGE_KEYS, METRICS_MERGE_COLUMNS)
+
+bd_rows: List[Dict[str, Any]] = _build_bd_rows(merged) if has_bd else []
 
 # ========== Overall ==========
 st.header("Overall", anchor="overall")
 
-# 构建性能数据 DataFrame
-df_perf_overall = pd.DataFrame(perf_rows) if perf_rows else pd.DataFrame()
-
 render_overall_section(
     df_metrics=df,
-    df_perf=df_perf_overall,
-    bd_list=bd_list_for_overall,
+    df_perf=df_perf,
+    bd_list=bd_rows,
     anchor_label="Anchor",
     test_label="Test",
     show_bd=has_bd,
@@ -317,11 +390,8 @@ metrics_format = {
 styled_metrics = df.style.format(metrics_format, na_rep="-")
 st.dataframe(styled_metrics, use_container_width=True, hide_index=True)
 
-anchor_df = df[df["Side"] == "Anchor"]
-test_df = df[df["Side"] == "Test"]
-merged = anchor_df.merge(test_df, on=["Video", "RC", "Point"], suffixes=("_anchor", "_test"))
 if not merged.empty:
-    merged["Bitrate Δ%"] = ((merged["Bitrate_kbps_test"] - merged["Bitrate_kbps_anchor"]) / merged["Bitrate_kbps_anchor"].replace(0, pd.NA)) * 100
+    merged["Bitrate Δ%"] = pct_change(merged["Bitrate_kbps_anchor"], merged["Bitrate_kbps_test"])
     merged["PSNR Δ"] = merged["PSNR_test"] - merged["PSNR_anchor"]
     merged["SSIM Δ"] = merged["SSIM_test"] - merged["SSIM_anchor"]
     merged["VMAF Δ"] = merged["VMAF_test"] - merged["VMAF_anchor"]
@@ -348,50 +418,63 @@ if not merged.empty:
         "VMAF-NEG Δ": "{:.2f}",
     }
 
-    styled_comparison = merged[
-        [
-            "Video",
-            "RC",
-            "Point",
-            "Bitrate_kbps_anchor",
-            "Bitrate_kbps_test",
-            "Bitrate Δ%",
-            "PSNR_anchor",
-            "PSNR_test",
-            "PSNR Δ",
-            "SSIM_anchor",
-            "SSIM_test",
-            "SSIM Δ",
-            "VMAF_anchor",
-            "VMAF_test",
-            "VMAF Δ",
-            "VMAF-NEG_anchor",
-            "VMAF-NEG_test",
-            "VMAF-NEG Δ",
-        ]
-    ].sort_values(by=["Video", "Point"]).style.format(comparison_format, na_rep="-")
+    comparison_view, comparison_column_config = build_table_view(
+        merged[
+            [
+                "Video",
+                "RC",
+                "Point",
+                "Bitrate_kbps_anchor",
+                "Bitrate_kbps_test",
+                "Bitrate Δ%",
+                "PSNR_anchor",
+                "PSNR_test",
+                "PSNR Δ",
+                "SSIM_anchor",
+                "SSIM_test",
+                "SSIM Δ",
+                "VMAF_anchor",
+                "VMAF_test",
+                "VMAF Δ",
+                "VMAF-NEG_anchor",
+                "VMAF-NEG_test",
+                "VMAF-NEG Δ",
+            ]
+        ],
+        comparison_format,
+        signed_cols=("Bitrate Δ%", "PSNR Δ", "SSIM Δ", "VMAF Δ", "VMAF-NEG Δ"),
+    )
 
     st.dataframe(
-        styled_comparison,
+        comparison_view,
         use_container_width=True,
         hide_index=True,
+        column_config=comparison_column_config or None,
     )
 
 if has_bd:
     st.header("BD-Rate", anchor="bd-rate")
-    if bd_rate_rows:
-        st.dataframe(pd.DataFrame(bd_rate_rows), use_container_width=True, hide_index=True)
+    df_bd = pd.DataFrame(bd_rows)
+    if bd_rows:
+        st.dataframe(
+            df_bd[list(BD_RATE_COLUMNS)].rename(columns=BD_RATE_COLUMNS),
+            use_container_width=True,
+            hide_index=True,
+        )
     else:
         st.info("无法计算 BD-Rate（点位不足或缺少共同视频）。")
 
     st.header("BD-Metrics", anchor="bd-metrics")
-    if bd_metric_rows:
-        st.dataframe(pd.DataFrame(bd_metric_rows), use_container_width=True, hide_index=True)
+    if bd_rows:
+        st.dataframe(
+            df_bd[list(BD_METRIC_COLUMNS)].rename(columns=BD_METRIC_COLUMNS),
+            use_container_width=True,
+            hide_index=True,
+        )
     else:
         st.info("无法计算 BD-Metrics（点位不足或缺少共同视频）。")
 
-if perf_rows:
-    df_perf = pd.DataFrame(perf_rows)
+if not df_perf.empty:
     perf_detail_format = {
         "Point": "{:.2f}",
         "FPS": "{:.2f}",
@@ -402,7 +485,8 @@ if perf_rows:
         df_perf=df_perf,
         anchor_label="Anchor",
         test_label="Test",
-        detail_df=df_perf.drop(columns=["cpu_samples"], errors="ignore"),
+        detail_df=df_perf,
+        cpu_samples_map={**anchor_meta["cpu_samples"], **test_meta["cpu_samples"]},
         detail_format=perf_detail_format,
         delta_point_key="perf_delta_point_analysis",
         delta_metric_key="perf_delta_metric_analysis",
@@ -6,11 +6,11 @@
 
 from __future__ import annotations
 
-import json
 import sys
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 import streamlit as st
@@ -24,13 +24,24 @@ from src.utils.streamlit_helpers import (
     list_jobs,
     get_query_param,
     load_json_report,
+    report_version,
+    session_memo,
     parse_rate_point as _parse_point,
+    parse_rate_points,
+    cpu_samples_array,
+    pct_change,
+    merge_anchor_test,
+    METRICS_MERGE_KEYS,
+    METRICS_MERGE_COLUMNS,
+    scatter_trace_type,
     color_positive_green,
     color_positive_red,
     format_env_info,
     render_overall_section,
     render_delta_bar_chart_by_point,
     render_delta_table_expander,
+    render_lazy_table_expander,
+    build_table_view,
 )
 from src.utils.streamlit_metrics_components import (
     inject_smooth_scroll_css,
@@ -39,15 +50,22 @@ from src.utils.streamlit_metrics_components import (
 
 
 def _list_template_jobs(limit: int = 50) -> List[Dict[str, Any]]:
-    return list_jobs("metrics_analysis/report_data.json", limit=limit)
+    return list_jobs(REPORT_DATA_PATH, limit=limit)
 
 
 def _get_job_id() -> Optional[str]:
     return get_query_param("template_job_id")
 
 
-def _load_report(job_id: str) -> Dict[str, Any]:
-    return load_json_report(job_id, "metrics_analysis/report_data.json")
+REPORT_DATA_PATH = "metrics_analysis/report_data.json"
+# 逐帧码率旁路文件（由 template_runner 写出，旧报告不存在时回退到 JSON 内的数组）
+FRAMES_DATA_PATH = "metrics_analysis/frames.npz"
+
+
+@st.cache_data(show_spinner=False)
+def _load_report(job_id: str, version: int) -> Dict[str, Any]:
+    """按任务 ID + 报告版本（mtime）缓存报告解析结果"""
+    return load_json_report(job_id, REPORT_DATA_PATH)
 
 
 def _format_points(points: List[float]) -> str:
@@ -65,15 +83,364 @@ def _format_encoder_params(info: Dict[str, Any]) -> str:
     return info.get("encoder_params") or "-"
 
 
-def _collect_points(entries: List[Dict[str, Any]], side_key: str) -> List[float]:
-    points: List[float] = []
-    for entry in entries:
-        side = entry.get(side_key) or {}
-        for item in side.get("encoded", []) or []:
-            _, val = _parse_point(item.get("label", ""))
-            if isinstance(val, (int, float)):
-                points.append(val)
-    return points
+def _as_float_array(values: List[Any]) -> np.ndarray:
+    """转为 float64 数组，无法解析的值记为 NaN"""
+    try:
+        return np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").to_numpy(dtype=np.float64)
+
+
+# 低基数字符串列用 category，指标列用 float32；Point 保持 float64 以便与选项值精确比较
+_RAW_METRICS_COLUMNS = ["Video", "Side", "label", "Bitrate_kbps", "PSNR", "SSIM", "VMAF", "VMAF-NEG"]
+METRICS_COLUMNS = ["Video", "Side", "RC", "Point", "Bitrate_kbps", "PSNR", "SSIM", "VMAF", "VMAF-NEG"]
+METRICS_DTYPES = {
+    "Video": "category",
+    "Side": "category",
+    "RC": "category",
+    "Bitrate_kbps": "float32",
+    "PSNR": "float32",
+    "SSIM": "float32",
+    "VMAF": "float32",
+    "VMAF-NEG": "float32",
+}
+PERF_DTYPES = {
+    "Video": "category",
+    "Side": "category",
+    "FPS": "float32",
+    "CPU Avg(%)": "float32",
+    "CPU Max(%)": "float32",
+}
+
+# 码率预聚合粒度（秒），与聚合间隔滑块的步长一致
+BITRATE_BASE_BIN = 0.1
+
+
+def _load_frames_sidecar(job_id: str) -> Dict[Tuple[str, str, str], Tuple[np.ndarray, np.ndarray]]:
+    """读取逐帧码率旁路文件，返回 (视频, 侧, 标签) -> (时间戳, 帧大小)；文件不存在时返回空字典"""
+    path = _jobs_root_dir() / job_id / FRAMES_DATA_PATH
+    if not path.exists():
+        return {}
+    with np.load(path) as data:
+        t = data["t"]
+        size = data["size"]
+        offsets = data["offsets"]
+        keys = zip(data["video"].tolist(), data["side"].tolist(), data["label"].tolist())
+        return {
+            key: (t[start:end], size[start:end])
+            for key, start, end in zip(keys, offsets[:-1].tolist(), offsets[1:].tolist())
+        }
+
+
+def _bin_frame_bits(ts: Any, sizes: Any, bin_sec: float) -> Tuple[np.ndarray, np.ndarray]:
+    """按时间区间累加帧比特数，返回 (区间序号, 比特数)；仅包含有帧落入的区间"""
+    n = min(len(ts), len(sizes))
+    ts_arr = _as_float_array(ts[:n])
+    sizes_arr = _as_float_array(sizes[:n])
+    valid = np.isfinite(ts_arr)
+    if not valid.any():
+        return np.empty(0, dtype=np.int64), np.empty(0)
+
+    # 与 int() 一致向零截断；先舍入到 1e-6 消除浮点误差（如 0.3 / 0.1 = 2.999…），
+    # 否则恰好落在区间边界上的帧会被划入前一区间。负区间通过偏移后再 bincount
+    idx = np.trunc(np.round(ts_arr[valid] / bin_sec, 6)).astype(np.int64)
+    offset = idx.min()
+    idx -= offset
+    bits = np.bincount(idx, weights=sizes_arr[valid] * 8.0)
+    occupied = np.flatnonzero(np.bincount(idx))
+    return occupied + offset, bits[occupied]
+
+
+def _build_bitrate_bins(
+    report: Dict[str, Any],
+    frames: Optional[Dict[Tuple[str, str, str], Tuple[np.ndarray, np.ndarray]]] = None,
+) -> Tuple[pd.DataFrame, Dict[Tuple[Any, float, str], float]]:
+    """
+    对所有 (视频, 点位, 侧) 按 BITRATE_BASE_BIN 预聚合帧比特数，生成长表
+    (video, point, side, bin, bits)，并记录各自的平均码率（kbps）。
+    逐帧数据优先取自旁路文件 frames，缺失时使用报告中的数组。
+    同一视频 / 点位重复出现时以第一条为准。
+    """
+    frames = frames or {}
+    parts: List[pd.DataFrame] = []
+    avg_kbps: Dict[Tuple[Any, float, str], float] = {}
+    seen_videos = set()
+    for entry in report.get("entries", []) or []:
+        video = entry.get("source")
+        if video in seen_videos:
+            continue
+        seen_videos.add(video)
+        for side_key in ("anchor", "test"):
+            seen_points = set()
+            for item in (entry.get(side_key) or {}).get("encoded") or []:
+                _, point = _parse_point(item.get("label", ""))
+                if point is None or point in seen_points:
+                    continue
+                seen_points.add(point)
+                bitrate = item.get("bitrate") or {}
+                frame_key = (video or "", side_key, item.get("label") or "")
+                if frame_key in frames:
+                    ts, sizes = frames[frame_key]
+                elif bitrate:
+                    ts = bitrate.get("frame_timestamps", []) or []
+                    sizes = bitrate.get("frame_sizes", []) or []
+                else:
+                    continue
+                avg_kbps[(video, point, side_key)] = (item.get("avg_bitrate_bps") or 0) / 1000
+                bins, bits = _bin_frame_bits(ts, sizes, BITRATE_BASE_BIN)
+                parts.append(
+                    pd.DataFrame({"video": video, "point": point, "side": side_key, "bin": bins, "bits": bits})
+                )
+    if not parts:
+        return pd.DataFrame(columns=["video", "point", "side", "bin", "bits"]), avg_kbps
+    return pd.concat(parts, ignore_index=True), avg_kbps
+
+
+@st.cache_data(show_spinner=False)
+def _compute_bitrate_bins(job_id: str, version: int) -> Tuple[pd.DataFrame, Dict[Tuple[Any, float, str], float]]:
+    """按任务 ID + 报告版本缓存码率预聚合结果"""
+    return _build_bitrate_bins(_load_report(job_id, version), _load_frames_sidecar(job_id))
+
+
+def _rebin_bitrate(df_side: pd.DataFrame, bin_seconds: float) -> Tuple[np.ndarray, np.ndarray]:
+    """将预聚合的细粒度区间合并为 bin_seconds 区间，返回 (时间点, kbps)"""
+    step = max(1, round(bin_seconds / BITRATE_BASE_BIN))
+    # 细区间序号向零截断得到，合并时同样向零截断（负时间戳下 // 会向下取整）
+    fine = df_side["bin"].to_numpy()
+    coarse = np.sign(fine) * (np.abs(fine) // step)
+    bits = df_side.groupby(coarse)["bits"].sum()
+    return bits.index.to_numpy() * bin_seconds, bits.to_numpy() / bin_seconds / 1000.0
+
+
+def _build_frames(report: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    遍历一次报告条目，构建页面所需的全部数据：
+    指标表、性能表（已排序）、码率点位选项以及 Anchor / Test 点位列表。
+    点位标签在构建完成后统一做一次向量化解析。
+    """
+    rows: List[Tuple[Any, ...]] = []
+    perf_rows: List[Dict[str, Any]] = []
+    perf_detail_rows: List[Dict[str, Any]] = []
+    perf_row_idx: List[int] = []
+    perf_samples: List[np.ndarray] = []
+
+    for entry in report.get("entries", []) or []:
+        video = entry.get("source")
+        for side_key, side_name in (("anchor", "Anchor"), ("test", "Test")):
+            side = (entry.get(side_key) or {})
+            for item in side.get("encoded", []) or []:
+                vmaf = item.get("vmaf") or {}
+                perf = item.get("performance") or {}
+                if perf:
+                    perf_row_idx.append(len(rows))
+                    cpu_samples = cpu_samples_array(perf.get("cpu_samples"))
+                    perf_samples.append(cpu_samples)
+                    perf_rows.append({
+                        "Video": video,
+                        "Side": side_name,
+                        "FPS": perf.get("encoding_fps"),
+                        "CPU Avg(%)": perf.get("cpu_avg_percent"),
+                        "CPU Max(%)": perf.get("cpu_max_percent"),
+                    })
+                    perf_detail_rows.append({
+                        "Video": video,
+                        "Side": side_name,
+                        "FPS": perf.get("encoding_fps"),
+                        "CPU Avg(%)": perf.get("cpu_avg_percent"),
+                        "CPU Max(%)": perf.get("cpu_max_percent"),
+                        "Total Time(s)": perf.get("total_encoding_time_s"),
+                        "Frames": perf.get("total_frames"),
+                    })
+                rows.append((
+                    video,
+                    side_name,
+                    item.get("label") or "",
+                    (item.get("avg_bitrate_bps") or 0) / 1000,
+                    (item.get("psnr") or {}).get("psnr_avg"),
+                    (item.get("ssim") or {}).get("ssim_avg"),
+                    vmaf.get("vmaf_mean"),
+                    vmaf.get("vmaf_neg_mean"),
+                ))
+
+    raw = pd.DataFrame.from_records(rows, columns=_RAW_METRICS_COLUMNS)
+    raw["RC"], raw["Point"] = parse_rate_points(raw.pop("label"))
+    df_metrics = raw[METRICS_COLUMNS].astype(METRICS_DTYPES)
+
+    point_values = df_metrics["Point"].to_numpy()
+    is_anchor = (df_metrics["Side"] == "Anchor").to_numpy()
+    # 码率分析的可选 (视频, 点位)：取 Anchor 侧去重
+    bitrate_points = (
+        df_metrics.loc[is_anchor & df_metrics["Point"].notna().to_numpy(), ["Video", "RC", "Point"]]
+        .drop_duplicates()
+        .reset_index(drop=True)
+    )
+
+    perf_sort = ["Video", "Point", "Side"]
+    df_perf = pd.DataFrame()
+    perf_detail_df = pd.DataFrame()
+    cpu_samples_map: Dict[Tuple[Any, float, str], np.ndarray] = {}
+    if perf_rows:
+        perf_points = point_values[perf_row_idx]
+        # CPU 采样数组不放入 DataFrame，按 (Video, Point, Side) 单独存放
+        cpu_samples_map = {
+            (row["Video"], point, row["Side"]): samples
+            for row, point, samples in zip(perf_rows, perf_points.tolist(), perf_samples)
+        }
+        df_perf = pd.DataFrame(perf_rows)
+        df_perf.insert(2, "Point", perf_points)
+        df_perf = df_perf.astype(PERF_DTYPES).sort_values(by=perf_sort).reset_index(drop=True)
+        perf_detail_df = pd.DataFrame(perf_detail_rows)
+        perf_detail_df.insert(2, "Point", perf_points)
+        perf_detail_df = perf_detail_df.sort_values(by=perf_sort).reset_index(drop=True)
+
+    points = df_metrics["Point"]
+    return {
+        "df_metrics": df_metrics,
+        "df_perf": df_perf,
+        "perf_detail_df": perf_detail_df,
+        "cpu_samples_map": cpu_samples_map,
+        "bitrate_points": bitrate_points,
+        "anchor_points": points[is_anchor].dropna().tolist(),
+        "test_points": points[~is_anchor].dropna().tolist(),
+    }
+
+
+@st.cache_data(show_spinner=False)
+def _compute_frames(job_id: str, version: int) -> Dict[str, Any]:
+    """按任务 ID + 报告版本缓存页面数据（避免对 report 字典做哈希）"""
+    return _build_frames(_load_report(job_id, version))
+
+
+@st.cache_data(show_spinner=False)
+def _rd_figure(job_id: str, version: int, video: str, metric: str) -> go.Figure:
+    """按 (任务, 版本, 视频, 指标) 缓存 RD 曲线图"""
+    df_metrics = _compute_frames(job_id, version)["df_metrics"]
+    video_df = df_metrics[df_metrics["Video"] == video]
+    anchor_data = video_df[video_df["Side"] == "Anchor"].sort_values("Bitrate_kbps")
+    test_data = video_df[video_df["Side"] == "Test"].sort_values("Bitrate_kbps")
+
+    fig = go.Figure()
+    fig.add_trace(
+        go.Scatter(
+            x=anchor_data["Bitrate_kbps"],
+            y=anchor_data[metric],
+            mode="lines+markers",
+            name="Anchor",
+            marker=dict(size=10, color="#636efa"),
+            line=dict(width=2, shape="spline", smoothing=1.3, color="#636efa"),
+        )
+    )
+    fig.add_trace(
+        go.Scatter(
+            x=test_data["Bitrate_kbps"],
+            y=test_data[metric],
+            mode="lines+markers",
+            name="Test",
+            marker=dict(size=10, color="#f0553b"),
+            line=dict(width=2, shape="spline", smoothing=1.3, color="#f0553b"),
+        )
+    )
+    fig.update_layout(
+        title=f"RD Curves - {video}",
+        xaxis_title="Bitrate (kbps)",
+        yaxis_title=metric,
+        hovermode="x unified",
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5),
+    )
+    return fig
+
+
+# BD 柱状图配置：(列名, 子标题, 锚点, 图标题)
+BD_RATE_CHARTS = (
+    ("bd_rate_psnr", "BD-Rate PSNR", "bd-rate-psnr", "BD-Rate PSNR, the less, the better"),
+    ("bd_rate_ssim", "BD-Rate SSIM", "bd-rate-ssim", "BD-Rate SSIM, the less, the better"),
+    ("bd_rate_vmaf", "BD-Rate VMAF", "bd-rate-vmaf", "BD-Rate VMAF, the less, the better"),
+    ("bd_rate_vmaf_neg", "BD-Rate VMAF-NEG", "bd-rate-vmaf-neg", "BD-Rate VMAF-NEG, the less, the better"),
+)
+BD_METRICS_CHARTS = (
+    ("bd_psnr", "BD PSNR", "bd-psnr", "BD PSNR, the more, the better"),
+    ("bd_ssim", "BD SSIM", "bd-ssim", "BD SSIM, the more, the better"),
+    ("bd_vmaf", "BD VMAF", "bd-vmaf", "BD VMAF, the more, the better"),
+    ("bd_vmaf_neg", "BD VMAF-NEG", "bd-vmaf-neg", "BD VMAF-NEG"),
+)
+
+
+@st.cache_data(show_spinner=False)
+def _bd_bar_figures(
+    job_id: str,
+    version: int,
+    charts: Tuple[Tuple[str, str, str, str], ...],
+    yaxis_title: str,
+    text_fmt: str,
+    lower_is_better: bool,
+) -> Dict[str, go.Figure]:
+    """
+    一次构建一组 BD 柱状图（按列名索引），按 (任务, 版本, 图组) 缓存。
+    先 melt 为长表，颜色与文本（text_fmt 为 printf 格式）在长表上向量化计算，再按列拆分为各自的图。
+    """
+    df_bd = pd.DataFrame(_load_report(job_id, version).get("bd_metrics", []) or [])
+    cols = [chart[0] for chart in charts]
+    long_df = df_bd.melt(id_vars="source", value_vars=cols, var_name="metric", value_name="value")
+    values = pd.to_numeric(long_df["value"], errors="coerce").to_numpy(dtype=float)
+    neg_color, pos_color = ("#00cc96", "#ef553b") if lower_is_better else ("#ef553b", "#00cc96")
+    long_df["color"] = np.where(values < 0, neg_color, np.where(values > 0, pos_color, "gray"))
+    long_df["text"] = np.where(np.isnan(values), "", np.char.mod(text_fmt, values))
+
+    groups = dict(tuple(long_df.groupby("metric", sort=False)))
+    figures: Dict[str, go.Figure] = {}
+    for col, _, _, title in charts:
+        part = groups[col]
+        fig = go.Figure(
+            go.Bar(
+                x=part["source"],
+                y=part["value"],
+                marker_color=part["color"].to_numpy(),
+                text=part["text"].to_numpy(),
+                textposition="outside",
+            )
+        )
+        fig.update_layout(
+            title=title,
+            xaxis_title="Video",
+            yaxis_title=yaxis_title,
+            showlegend=False,
+        )
+        figures[col] = fig
+    return figures
+
+
+@st.cache_data(show_spinner=False)
+def _bitrate_figure(
+    job_id: str,
+    version: int,
+    video: str,
+    point: float,
+    chart_type: str,
+    bin_seconds: float,
+) -> go.Figure:
+    """按 (任务, 版本, 视频, 点位, 图形类型, 聚合间隔) 缓存码率对比图"""
+    df_br, _ = _compute_bitrate_bins(job_id, version)
+    df_pair = df_br[(df_br["video"] == video) & (df_br["point"] == point)]
+    anchor_x, anchor_y = _rebin_bitrate(df_pair[df_pair["side"] == "anchor"], bin_seconds)
+    test_x, test_y = _rebin_bitrate(df_pair[df_pair["side"] == "test"], bin_seconds)
+
+    fig = go.Figure()
+    if chart_type == "柱状图":
+        fig.add_trace(go.Bar(x=anchor_x, y=anchor_y, name="Anchor", opacity=0.7, marker_color="#636efa"))
+        fig.add_trace(go.Bar(x=test_x, y=test_y, name="Test", opacity=0.7, marker_color="#f0553b"))
+        fig.update_layout(barmode="group")
+    else:
+        fig.add_trace(scatter_trace_type(len(anchor_x))(x=anchor_x, y=anchor_y, mode="lines+markers", name="Anchor", line=dict(color="#636efa"), marker=dict(color="#636efa")))
+        fig.add_trace(scatter_trace_type(len(test_x))(x=test_x, y=test_y, mode="lines+markers", name="Test", line=dict(color="#f0553b"), marker=dict(color="#f0553b")))
+
+    fig.update_layout(
+        title=f"码率对比 - {video} ({point})",
+        xaxis_title="Time (s)",
+        yaxis_title="Bitrate (kbps)",
+        hovermode="x unified",
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5),
+    )
+    return fig
 
 
 st.set_page_config(page_title="Metrics对比", page_icon="📊", layout="wide")
@@ -114,8 +481,9 @@ try:
 except Exception:
     pass
 
+report_ver = report_version(job_id, REPORT_DATA_PATH)
 try:
-    report = _load_report(job_id)
+    report = _load_report(job_id, report_ver)
 except Exception as exc:
     st.error(str(exc))
     st.stop()
@@ -124,19 +492,15 @@ if report.get("kind") != "template_metrics":
     st.error("该任务不是模板指标报告或数据格式不匹配。")
     st.stop()
 
-entries: List[Dict[str, Any]] = report.get("entries", []) or []
 bd_list: List[Dict[str, Any]] = report.get("bd_metrics", []) or []
 
-point_values: set = set()
-for entry in entries:
-    for side_key in ("anchor", "test"):
-        side = entry.get(side_key) or {}
-        for item in side.get("encoded", []) or []:
-            _, val = _parse_point(item.get("label", ""))
-            if isinstance(val, (int, float)):
-                point_values.add(val)
+frames = _compute_frames(job_id, report_ver)
+df_metrics: pd.DataFrame = frames["df_metrics"]
+df_perf: pd.DataFrame = frames["df_perf"]
+anchor_points: List[float] = frames["anchor_points"]
+test_points: List[float] = frames["test_points"]
 
-has_bd = len(point_values) >= 4
+has_bd = len(set(anchor_points) | set(test_points)) >= 4
 if not has_bd:
     bd_list = []
 
@@ -195,8 +559,6 @@ st.header("Information", anchor="information")
 
 anchor_info = report.get("anchor", {}) or {}
 test_info = report.get("test", {}) or {}
-anchor_points = _collect_points(entries, "anchor")
-test_points = _collect_points(entries, "test")
 
 info_df = pd.DataFrame(
     [
@@ -211,46 +573,9 @@ st.dataframe(info_df, use_container_width=True, hide_index=True)
 # ========== Overall ==========
 st.header("Overall", anchor="overall")
 
-# 先构建数据用于 Overall 计算
-_overall_rows = []
-_overall_perf_rows = []
-for entry in entries:
-    video = entry.get("source")
-    for side_key, side_name in (("anchor", "Anchor"), ("test", "Test")):
-        side = (entry.get(side_key) or {})
-        for item in side.get("encoded", []) or []:
-            rc, val = _parse_point(item.get("label", ""))
-            psnr_avg = (item.get("psnr") or {}).get("psnr_avg")
-            ssim_avg = (item.get("ssim") or {}).get("ssim_avg")
-            vmaf_mean = (item.get("vmaf") or {}).get("vmaf_mean")
-            vmaf_neg_mean = (item.get("vmaf") or {}).get("vmaf_neg_mean")
-            _overall_rows.append({
-                "Video": video,
-                "Side": side_name,
-                "RC": rc,
-                "Point": val,
-                "Bitrate_kbps": (item.get("avg_bitrate_bps") or 0) / 1000,
-                "PSNR": psnr_avg,
-                "SSIM": ssim_avg,
-                "VMAF": vmaf_mean,
-                "VMAF-NEG": vmaf_neg_mean,
-            })
-            perf = item.get("performance") or {}
-            if perf:
-                _overall_perf_rows.append({
-                    "Video": video,
-                    "Side": side_name,
-                    "Point": val,
-                    "FPS": perf.get("encoding_fps"),
-                    "CPU Avg(%)": perf.get("cpu_avg_percent"),
-                })
-
-_df_overall = pd.DataFrame(_overall_rows)
-_df_overall_perf = pd.DataFrame(_overall_perf_rows) if _overall_perf_rows else pd.DataFrame()
-
 render_overall_section(
-    df_metrics=_df_overall,
-    df_perf=_df_overall_perf,
+    df_metrics=df_metrics,
+    df_perf=df_perf,
     bd_list=bd_list if has_bd else [],
     anchor_label="Anchor",
     test_label="Test",
@@ -261,32 +586,6 @@ render_overall_section(
 # ========== Metrics ==========
 st.header("Metrics", anchor="metrics")
 
-rows = []
-for entry in entries:
-    video = entry.get("source")
-    for side_key, side_name in (("anchor", "Anchor"), ("test", "Test")):
-        side = (entry.get(side_key) or {})
-        for item in side.get("encoded", []) or []:
-            rc, val = _parse_point(item.get("label", ""))
-            psnr_avg = (item.get("psnr") or {}).get("psnr_avg")
-            ssim_avg = (item.get("ssim") or {}).get("ssim_avg")
-            vmaf_mean = (item.get("vmaf") or {}).get("vmaf_mean")
-            vmaf_neg_mean = (item.get("vmaf") or {}).get("vmaf_neg_mean")
-            rows.append(
-                {
-                    "Video": video,
-                    "Side": side_name,
-                    "RC": rc,
-                    "Point": val,
-                    "Bitrate_kbps": (item.get("avg_bitrate_bps") or 0) / 1000,
-                    "PSNR": psnr_avg,
-                    "SSIM": ssim_avg,
-                    "VMAF": vmaf_mean,
-                    "VMAF-NEG": vmaf_neg_mean,
-                }
-            )
-
-df_metrics = pd.DataFrame(rows)
 if df_metrics.empty:
     st.warning("报告中没有可用的指标数据。")
     st.stop()
@@ -303,52 +602,20 @@ with col_select:
     selected_video = st.selectbox("选择视频", video_list, key="rd_video")
     selected_metric = st.selectbox("选择指标", metric_options, key="rd_metric")
 
-# 筛选数据并绘制 RD 曲线
-video_df = df_metrics[df_metrics["Video"] == selected_video]
-anchor_data = video_df[video_df["Side"] == "Anchor"].sort_values("Bitrate_kbps")
-test_data = video_df[video_df["Side"] == "Test"].sort_values("Bitrate_kbps")
-
-fig_rd = go.Figure()
-fig_rd.add_trace(
-    go.Scatter(
-        x=anchor_data["Bitrate_kbps"],
-        y=anchor_data[selected_metric],
-        mode="lines+markers",
-        name="Anchor",
-        marker=dict(size=10, color="#636efa"),
-        line=dict(width=2, shape="spline", smoothing=1.3, color="#636efa"),
-    )
-)
-fig_rd.add_trace(
-    go.Scatter(
-        x=test_data["Bitrate_kbps"],
-        y=test_data[selected_metric],
-        mode="lines+markers",
-        name="Test",
-        marker=dict(size=10, color="#f0553b"),
-        line=dict(width=2, shape="spline", smoothing=1.3, color="#f0553b"),
-    )
-)
-fig_rd.update_layout(
-    title=f"RD Curves - {selected_video}",
-    xaxis_title="Bitrate (kbps)",
-    yaxis_title=selected_metric,
-    hovermode="x unified",
-    legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5),
-)
 with col_chart:
+    fig_rd = session_memo(
+        "rd_fig",
+        (job_id, report_ver, selected_video, selected_metric),
+        lambda: _rd_figure(job_id, report_ver, selected_video, selected_metric),
+    )
     st.plotly_chart(fig_rd, use_container_width=True)
 
 # Diff 对比表（Anchor vs Test）
 anchor_df = df_metrics[df_metrics["Side"] == "Anchor"]
 test_df = df_metrics[df_metrics["Side"] == "Test"]
-merged = anchor_df.merge(
-    test_df,
-    on=["Video", "RC", "Point"],
-    suffixes=("_anchor", "_test"),
-)
+merged = merge_anchor_test(anchor_df, test_df, METRICS_MERGE_KEYS, METRICS_MERGE_COLUMNS)
 if not merged.empty:
-    merged["Bitrate Δ%"] = ((merged["Bitrate_kbps_test"] - merged["Bitrate_kbps_anchor"]) / merged["Bitrate_kbps_anchor"].replace(0, pd.NA)) * 100
+    merged["Bitrate Δ%"] = pct_change(merged["Bitrate_kbps_anchor"], merged["Bitrate_kbps_test"])
     merged["PSNR Δ"] = merged["PSNR_test"] - merged["PSNR_anchor"]
     merged["SSIM Δ"] = merged["SSIM_test"] - merged["SSIM_anchor"]
     merged["VMAF Δ"] = merged["VMAF_test"] - merged["VMAF_anchor"]
@@ -360,22 +627,8 @@ if not merged.empty:
     chart_df = diff_df.copy()
 
     # 合并同一视频的名称（只在第一行显示）
-    prev_video = None
-    for idx in diff_df.index:
-        if diff_df.at[idx, "Video"] == prev_video:
-            diff_df.at[idx, "Video"] = ""
-        else:
-            prev_video = diff_df.at[idx, "Video"]
-
-    # 定义颜色样式函数
-    def _color_diff(val):
-        if pd.isna(val) or not isinstance(val, (int, float)):
-            return ""
-        if val > 0:
-            return "color: green"
-        elif val < 0:
-            return "color: red"
-        return ""
+    videos = diff_df["Video"].astype(object)
+    diff_df["Video"] = videos.mask(videos.eq(videos.shift()), "")
 
     diff_cols = ["Bitrate Δ%", "PSNR Δ", "SSIM Δ", "VMAF Δ", "VMAF-NEG Δ"]
 
@@ -388,7 +641,12 @@ if not merged.empty:
         "VMAF Δ": "{:.2f}",
         "VMAF-NEG Δ": "{:.2f}",
     }
-    styled_df = diff_df.style.applymap(_color_diff, subset=diff_cols).format(format_dict, na_rep="-")
+    diff_view, diff_column_config = build_table_view(
+        diff_df,
+        format_dict,
+        style_fn=lambda styler: styler.apply(color_positive_green, subset=diff_cols, axis=None),
+        signed_cols=tuple(diff_cols),
+    )
 
     st.subheader("Delta", anchor="delta")
 
@@ -412,27 +670,29 @@ if not merged.empty:
 
     render_delta_table_expander(
         "查看详细Delta数据",
-        styled_df,
+        diff_view,
         column_config={
+            **diff_column_config,
             "Video": st.column_config.TextColumn("Video", width="medium"),
         },
     )
 
 # 详细表格（默认折叠）
 st.subheader("Details", anchor="details")
-with st.expander("查看详细Metrics数据", expanded=False):
-    # 格式化精度
-    details_format = {
-        "Point": "{:.2f}",
-        "Bitrate_kbps": "{:.2f}",
-        "PSNR": "{:.4f}",
-        "SSIM": "{:.4f}",
-        "VMAF": "{:.2f}",
-        "VMAF-NEG": "{:.2f}",
-    }
-    styled_details = df_metrics.sort_values(by=["Video", "RC", "Point", "Side"]).style.format(details_format, na_rep="-")
-    st.dataframe(styled_details, use_container_width=True, hide_index=True)
-
+details_format = {
+    "Point": "{:.2f}",
+    "Bitrate_kbps": "{:.2f}",
+    "PSNR": "{:.4f}",
+    "SSIM": "{:.4f}",
+    "VMAF": "{:.2f}",
+    "VMAF-NEG": "{:.2f}",
+}
+render_lazy_table_expander(
+    "查看详细Metrics数据",
+    "metrics_details_open",
+    len(df_metrics),
+    lambda: df_metrics.sort_values(by=["Video", "RC", "Point", "Side"]).style.format(details_format, na_rep="-"),
+)
 
 if has_bd:
     # ========== BD-Rate ==========
@@ -440,16 +700,6 @@ if has_bd:
     if bd_list:
         df_bd = pd.DataFrame(bd_list)
 
-        # BD-Rate 颜色样式：小于0绿色，大于0红色
-        def _color_bd_rate(val):
-            if pd.isna(val) or not isinstance(val, (int, float)):
-                return ""
-            if val < 0:
-                return "color: green"
-            elif val > 0:
-                return "color: red"
-            return ""
-
         bd_rate_cols = ["bd_rate_psnr", "bd_rate_ssim", "bd_rate_vmaf", "bd_rate_vmaf_neg"]
         bd_rate_display = df_bd[["source"] + bd_rate_cols].rename(
             columns={
@@ -460,9 +710,11 @@ if has_bd:
                 "bd_rate_vmaf_neg": "BD-Rate VMAF-NEG (%)",
             }
         )
-        styled_bd_rate = bd_rate_display.style.applymap(
-            _color_bd_rate,
+        # BD-Rate 颜色样式：小于0绿色，大于0红色
+        styled_bd_rate = bd_rate_display.style.apply(
+            color_positive_red,
             subset=["BD-Rate PSNR (%)", "BD-Rate SSIM (%)", "BD-Rate VMAF (%)", "BD-Rate VMAF-NEG (%)"],
+            axis=None,
         ).format({
             "BD-Rate PSNR (%)": "{:.2f}",
             "BD-Rate SSIM (%)": "{:.2f}",
@@ -472,37 +724,14 @@ if has_bd:
         st.dataframe(styled_bd_rate, use_container_width=True, hide_index=True)
 
         # BD-Rate 柱状图（拆分为独立子标题）
-        def _create_bd_bar_chart(df, col, title):
-            colors = ["#00cc96" if v < 0 else "#ef553b" if v > 0 else "gray" for v in df[col].fillna(0)]
-            fig = go.Figure()
-            fig.add_trace(
-                go.Bar(
-                    x=df["source"],
-                    y=df[col],
-                    marker_color=colors,
-                    text=[f"{v:.2f}%" if pd.notna(v) else "" for v in df[col]],
-                    textposition="outside",
-                )
-            )
-            fig.update_layout(
-                title=title,
-                xaxis_title="Video",
-                yaxis_title="BD-Rate (%)",
-                showlegend=False,
-            )
-            return fig
-
-        st.subheader("BD-Rate PSNR", anchor="bd-rate-psnr")
-        st.plotly_chart(_create_bd_bar_chart(df_bd, "bd_rate_psnr", "BD-Rate PSNR, the less, the better"), use_container_width=True)
-
-        st.subheader("BD-Rate SSIM", anchor="bd-rate-ssim")
-        st.plotly_chart(_create_bd_bar_chart(df_bd, "bd_rate_ssim", "BD-Rate SSIM, the less, the better"), use_container_width=True)
-
-        st.subheader("BD-Rate VMAF", anchor="bd-rate-vmaf")
-        st.plotly_chart(_create_bd_bar_chart(df_bd, "bd_rate_vmaf", "BD-Rate VMAF, the less, the better"), use_container_width=True)
-
-        st.subheader("BD-Rate VMAF-NEG", anchor="bd-rate-vmaf-neg")
-        st.plotly_chart(_create_bd_bar_chart(df_bd, "bd_rate_vmaf_neg", "BD-Rate VMAF-NEG, the less, the better"), use_container_width=True)
+        bd_rate_figures = session_memo(
+            "bd_rate_figs",
+            (job_id, report_ver),
+            lambda: _bd_bar_figures(job_id, report_ver, BD_RATE_CHARTS, "BD-Rate (%)", "%.2f%%", True),
+        )
+        for col, subheader, anchor, _ in BD_RATE_CHARTS:
+            st.subheader(subheader, anchor=anchor)
+            st.plotly_chart(bd_rate_figures[col], use_container_width=True)
     else:
         st.info("暂无 BD-Rate 数据。")
 
@@ -512,16 +741,6 @@ if has_bd:
     if bd_list:
         df_bdm = pd.DataFrame(bd_list)
 
-        # BD-Metrics 颜色样式：大于0绿色，小于0红色
-        def _color_bd_metrics(val):
-            if pd.isna(val) or not isinstance(val, (int, float)):
-                return ""
-            if val > 0:
-                return "color: green"
-            elif val < 0:
-                return "color: red"
-            return ""
-
         bd_metrics_cols = ["bd_psnr", "bd_ssim", "bd_vmaf", "bd_vmaf_neg"]
         bd_metrics_display = df_bdm[["source"] + bd_metrics_cols].rename(
             columns={
@@ -532,9 +751,11 @@ if has_bd:
                 "bd_vmaf_neg": "BD VMAF-NEG",
             }
         )
-        styled_bd_metrics = bd_metrics_display.style.applymap(
-            _color_bd_metrics,
+        # BD-Metrics 颜色样式：大于0绿色，小于0红色
+        styled_bd_metrics = bd_metrics_display.style.apply(
+            color_positive_green,
             subset=["BD PSNR", "BD SSIM", "BD VMAF", "BD VMAF-NEG"],
+            axis=None,
         ).format({
             "BD PSNR": "{:.4f}",
             "BD SSIM": "{:.4f}",
@@ -544,37 +765,14 @@ if has_bd:
         st.dataframe(styled_bd_metrics, use_container_width=True, hide_index=True)
 
         # BD-Metrics 柱状图（拆分为独立子标题）
-        def _create_bd_metrics_bar_chart(df, col, title):
-            colors = ["#00cc96" if v > 0 else "#ef553b" if v < 0 else "gray" for v in df[col].fillna(0)]
-            fig = go.Figure()
-            fig.add_trace(
-                go.Bar(
-                    x=df["source"],
-                    y=df[col],
-                    marker_color=colors,
-                    text=[f"{v:.4f}" if pd.notna(v) else "" for v in df[col]],
-                    textposition="outside",
-                )
-            )
-            fig.update_layout(
-                title=title,
-                xaxis_title="Video",
-                yaxis_title="Δ Metric",
-                showlegend=False,
-            )
-            return fig
-
-        st.subheader("BD PSNR", anchor="bd-psnr")
-        st.plotly_chart(_create_bd_metrics_bar_chart(df_bdm, "bd_psnr", "BD PSNR, the more, the better"), use_container_width=True)
-
-        st.subheader("BD SSIM", anchor="bd-ssim")
-        st.plotly_chart(_create_bd_metrics_bar_chart(df_bdm, "bd_ssim", "BD SSIM, the more, the better"), use_container_width=True)
-
-        st.subheader("BD VMAF", anchor="bd-vmaf")
-        st.plotly_chart(_create_bd_metrics_bar_chart(df_bdm, "bd_vmaf", "BD VMAF, the more, the better"), use_container_width=True)
-
-        st.subheader("BD VMAF-NEG", anchor="bd-vmaf-neg")
-        st.plotly_chart(_create_bd_metrics_bar_chart(df_bdm, "bd_vmaf_neg", "BD VMAF-NEG"), use_container_width=True)
+        bd_metrics_figures = session_memo(
+            "bd_metrics_figs",
+            (job_id, report_ver),
+            lambda: _bd_bar_figures(job_id, report_ver, BD_METRICS_CHARTS, "Δ Metric", "%.4f", False),
+        )
+        for col, subheader, anchor, _ in BD_METRICS_CHARTS:
+            st.subheader(subheader, anchor=anchor)
+            st.plotly_chart(bd_metrics_figures[col], use_container_width=True)
     else:
         st.info("暂无 BD-Metrics 数据。")
 
@@ -582,29 +780,14 @@ if has_bd:
 # ========== Bitrate 分析 ==========
 st.header("Bitrates", anchor="码率分析")
 
-# 构建可选的视频和点位列表
-video_point_options = []
-for entry in entries:
-    video = entry.get("source")
-    anchor_enc = (entry.get("anchor") or {}).get("encoded") or []
-    for item in anchor_enc:
-        rc, point = _parse_point(item.get("label", ""))
-        if point is not None:
-            video_point_options.append({
-                "video": video,
-                "point": point,
-                "rc": rc,
-                "label": f"{video} - {rc}_{point}",
-            })
-
-if video_point_options:
+bitrate_points: pd.DataFrame = frames["bitrate_points"]
+if not bitrate_points.empty:
     col_sel1, col_sel2 = st.columns(2)
     with col_sel1:
-        video_list_br = list(dict.fromkeys([opt["video"] for opt in video_point_options]))
+        video_list_br = bitrate_points["Video"].unique().tolist()
         selected_video_br = st.selectbox("选择源视频", video_list_br, key="br_video")
     with col_sel2:
-        point_list_br = [opt["point"] for opt in video_point_options if opt["video"] == selected_video_br]
-        point_list_br = list(dict.fromkeys(point_list_br))
+        point_list_br = bitrate_points.loc[bitrate_points["Video"] == selected_video_br, "Point"].unique().tolist()
         selected_point_br = st.selectbox("选择码率点位", point_list_br, key="br_point")
 
     col_opt1, col_opt2 = st.columns(2)
@@ -613,84 +796,18 @@ if video_point_options:
     with col_opt2:
         bin_seconds = st.slider("聚合间隔 (秒)", min_value=0.1, max_value=5.0, value=1.0, step=0.1, key="br_bin")
 
-    # 找到对应的 anchor 和 test 数据
-    anchor_bitrate = None
-    test_bitrate = None
-    ref_fps = 30.0
-
-    for entry in entries:
-        if entry.get("source") == selected_video_br:
-            ref_info = (entry.get("anchor") or {}).get("reference") or {}
-            ref_fps = ref_info.get("fps") or 30.0
-
-            for item in (entry.get("anchor") or {}).get("encoded") or []:
-                rc, point = _parse_point(item.get("label", ""))
-                if point == selected_point_br:
-                    anchor_bitrate = item.get("bitrate") or {}
-                    break
-
-            for item in (entry.get("test") or {}).get("encoded") or []:
-                rc, point = _parse_point(item.get("label", ""))
-                if point == selected_point_br:
-                    test_bitrate = item.get("bitrate") or {}
-                    break
-            break
-
-    if anchor_bitrate and test_bitrate:
-        def _aggregate_bitrate(bitrate_data, bin_sec):
-            ts = bitrate_data.get("frame_timestamps", []) or []
-            sizes = bitrate_data.get("frame_sizes", []) or []
-            bins = {}
-            for t, s in zip(ts, sizes):
-                try:
-                    idx = int(float(t) / bin_sec)
-                except (TypeError, ValueError):
-                    continue
-                bins[idx] = bins.get(idx, 0.0) + float(s) * 8.0
-            xs = sorted(bins.keys())
-            x_times = [i * bin_sec for i in xs]
-            y_kbps = [(bins[i] / bin_sec) / 1000.0 for i in xs]
-            return x_times, y_kbps
-
-        anchor_x, anchor_y = _aggregate_bitrate(anchor_bitrate, bin_seconds)
-        test_x, test_y = _aggregate_bitrate(test_bitrate, bin_seconds)
-
-        fig_br = go.Figure()
-        if chart_type == "柱状图":
-            fig_br.add_trace(go.Bar(x=anchor_x, y=anchor_y, name="Anchor", opacity=0.7, marker_color="#636efa"))
-            fig_br.add_trace(go.Bar(x=test_x, y=test_y, name="Test", opacity=0.7, marker_color="#f0553b"))
-            fig_br.update_layout(barmode="group")
-        else:
-            fig_br.add_trace(go.Scatter(x=anchor_x, y=anchor_y, mode="lines+markers", name="Anchor", line=dict(color="#636efa"), marker=dict(color="#636efa")))
-            fig_br.add_trace(go.Scatter(x=test_x, y=test_y, mode="lines+markers", name="Test", line=dict(color="#f0553b"), marker=dict(color="#f0553b")))
-
-        fig_br.update_layout(
-            title=f"码率对比 - {selected_video_br} ({selected_point_br})",
-            xaxis_title="Time (s)",
-            yaxis_title="Bitrate (kbps)",
-            hovermode="x unified",
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5),
-        )
+    df_br, avg_kbps = _compute_bitrate_bins(job_id, report_ver)
+    anchor_key = (selected_video_br, selected_point_br, "anchor")
+    test_key = (selected_video_br, selected_point_br, "test")
+
+    if anchor_key in avg_kbps and test_key in avg_kbps:
+        br_key = (job_id, report_ver, selected_video_br, selected_point_br, chart_type, bin_seconds)
+        fig_br = session_memo("br_fig", br_key, lambda: _bitrate_figure(*br_key))
         st.plotly_chart(fig_br, use_container_width=True)
 
         # 显示平均码率对比
-        anchor_avg = (anchor_bitrate.get("avg_bitrate_bps") or sum(anchor_bitrate.get("frame_sizes", [])) * 8 / (len(anchor_bitrate.get("frame_timestamps", [])) / ref_fps if anchor_bitrate.get("frame_timestamps") else 1)) / 1000
-        test_avg = (test_bitrate.get("avg_bitrate_bps") or sum(test_bitrate.get("frame_sizes", [])) * 8 / (len(test_bitrate.get("frame_timestamps", [])) / ref_fps if test_bitrate.get("frame_timestamps") else 1)) / 1000
-
-        # 从 entries 中获取 avg_bitrate_bps
-        for entry in entries:
-            if entry.get("source") == selected_video_br:
-                for item in (entry.get("anchor") or {}).get("encoded") or []:
-                    rc, point = _parse_point(item.get("label", ""))
-                    if point == selected_point_br:
-                        anchor_avg = item.get("avg_bitrate_bps", 0) / 1000
-                        break
-                for item in (entry.get("test") or {}).get("encoded") or []:
-                    rc, point = _parse_point(item.get("label", ""))
-                    if point == selected_point_br:
-                        test_avg = item.get("avg_bitrate_bps", 0) / 1000
-                        break
-                break
+        anchor_avg = avg_kbps[anchor_key]
+        test_avg = avg_kbps[test_key]
 
         col_m1, col_m2, col_m3 = st.columns(3)
         col_m1.metric("Anchor 平均码率", f"{anchor_avg:.2f} kbps")
@@ -706,40 +823,8 @@ else:
 # ========== Performance ==========
 st.header("Performance", anchor="performance")
 
-# 收集性能数据
-perf_rows = []
-perf_detail_rows = []
-for entry in entries:
-    video = entry.get("source")
-    for side_key, side_name in (("anchor", "Anchor"), ("test", "Test")):
-        side = (entry.get(side_key) or {})
-        for item in side.get("encoded", []) or []:
-            rc, point = _parse_point(item.get("label", ""))
-            perf = item.get("performance") or {}
-            if perf:
-                perf_rows.append({
-                    "Video": video,
-                    "Side": side_name,
-                    "Point": point,
-                    "FPS": perf.get("encoding_fps"),
-                    "CPU Avg(%)": perf.get("cpu_avg_percent"),
-                    "CPU Max(%)": perf.get("cpu_max_percent"),
-                    "cpu_samples": perf.get("cpu_samples", []),
-                })
-                perf_detail_rows.append({
-                    "Video": video,
-                    "Side": side_name,
-                    "Point": point,
-                    "FPS": perf.get("encoding_fps"),
-                    "CPU Avg(%)": perf.get("cpu_avg_percent"),
-                    "CPU Max(%)": perf.get("cpu_max_percent"),
-                    "Total Time(s)": perf.get("total_encoding_time_s"),
-                    "Frames": perf.get("total_frames"),
-                })
-
-if perf_rows:
-    df_perf = pd.DataFrame(perf_rows)
-    perf_detail_df = pd.DataFrame(perf_detail_rows)
+if not df_perf.empty:
+    perf_detail_df = frames["perf_detail_df"]
     perf_detail_format = {
         "Point": "{:.2f}",
         "FPS": "{:.2f}",
@@ -752,6 +837,7 @@ if perf_rows:
         anchor_label="Anchor",
         test_label="Test",
         detail_df=perf_detail_df,
+        cpu_samples_map=frames["cpu_samples_map"],
         detail_format=perf_detail_format,
         delta_point_key="perf_delta_point",
         delta_metric_key="perf_delta_metric",
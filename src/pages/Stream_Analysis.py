@@ -6,7 +6,6 @@
 
 from __future__ import annotations
 
-import json
 import sys
 from pathlib import Path
 from typing import Any, Dict, List, Optional
@@ -26,6 +25,7 @@ from src.utils.streamlit_helpers import (
     list_jobs,
     get_query_param,
     load_json_report,
+    color_positive_green,
 )
 
 
@@ -322,18 +322,8 @@ if len(df_metrics) >= 2:
     diff_df.iloc[0, 1:] = 0  # 基准行显示 0
     diff_df.columns = pd.MultiIndex.from_tuples(anchor_columns)
 
-    # 定义颜色样式函数
-    def _color_diff(val):
-        if pd.isna(val) or not isinstance(val, (int, float)):
-            return ""
-        if val > 0:
-            return "color: green"
-        elif val < 0:
-            return "color: red"
-        return ""
-
     # 应用颜色样式和格式化精度到所有数值列（除了第一列 Encoded）
-    styled_diff = diff_df.style.applymap(_color_diff, subset=diff_df.columns[1:]).format(format_dict, na_rep="-")
+    styled_diff = diff_df.style.apply(color_positive_green, subset=diff_df.columns[1:], axis=None).format(format_dict, na_rep="-")
     st.dataframe(styled_diff, use_container_width=True, hide_index=True)
 
 # PSNR 逐帧折线图
@@ -15,9 +15,18 @@ import logging
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
+
 from src.config import settings
 from src.models import Job
-from src.services.ffmpeg import ffmpeg_service
+from src.services.ffmpeg import (
+    build_fused_metrics_filter,
+    ffmpeg_service,
+    metric_thread_args,
+    metric_threads,
+    run_piped_with_stderr_tail,
+    run_with_stderr_tail,
+)
 from src.utils.metrics import parse_psnr_log, parse_ssim_log, parse_vmaf_log
 
 logger = logging.getLogger(__name__)
@@ -41,20 +50,19 @@ def _count_yuv420p_frames(path: Path, width: int, height: int) -> int:
     return size // frame_size
 
 
-async def _run_subprocess(cmd: List[str]) -> None:
-    process = await asyncio.create_subprocess_exec(
-        *cmd,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-    )
+async def _run_subprocess(cmd: List[str], producer_cmd: Optional[List[str]] = None) -> None:
     try:
-        _, stderr = await asyncio.wait_for(process.communicate(), timeout=settings.ffmpeg_timeout)
+        if producer_cmd:
+            returncode, stderr_tail = await run_piped_with_stderr_tail(
+                producer_cmd, cmd, settings.ffmpeg_timeout
+            )
+        else:
+            returncode, stderr_tail = await run_with_stderr_tail(cmd, settings.ffmpeg_timeout)
     except asyncio.TimeoutError:
-        process.kill()
         raise RuntimeError("Command timed out")
 
-    if process.returncode != 0:
-        raise RuntimeError(stderr.decode(errors="ignore"))
+    if returncode != 0:
+        raise RuntimeError(stderr_tail)
 
 
 async def _infer_input_format(path: Path) -> Optional[str]:
@@ -150,14 +158,15 @@ async def build_bitstream_report(
     ref_frames_total = _count_yuv420p_frames(ref_yuv, ref_width, ref_height)
 
     # 命令日志包装
-    async def _run_logged(cmd: List[str], cmd_type: str):
+    async def _run_logged(cmd: List[str], cmd_type: str, producer_cmd: Optional[List[str]] = None):
         cmd_id = None
         if add_command_callback:
-            cmd_id = add_command_callback(cmd_type, " ".join(cmd), str(reference_path))
+            cmd_argv = [*producer_cmd, "|", *cmd] if producer_cmd else cmd
+            cmd_id = add_command_callback(cmd_type, cmd_argv, str(reference_path))
         if update_status_callback and cmd_id:
             update_status_callback(cmd_id, "running")
         try:
-            await _run_subprocess(cmd)
+            await _run_subprocess(cmd, producer_cmd)
             if update_status_callback and cmd_id:
                 update_status_callback(cmd_id, "completed")
         except Exception as exc:
@@ -202,7 +211,10 @@ async def build_bitstream_report(
             enc_fps = ref_fps
 
         # 2.3 转换为 yuv420p（必要时缩放到 Ref 分辨率）
+        # 码流输入不落盘：解码进程经管道直接喂给指标计算进程，帧数取自 ffprobe 逐帧信息
         enc_yuv = analysis_dir / f"encoded_{idx+1}_yuv420p.yuv"
+        decode_cmd: Optional[List[str]] = None
+        frames_info: Dict[str, np.ndarray] = {}
 
         scaled = False
         if enc_is_yuv:
@@ -224,24 +236,26 @@ async def build_bitstream_report(
                 )
             else:
                 enc_yuv = enc_input
+            enc_frames = _count_yuv420p_frames(enc_yuv, ref_width, ref_height)
         else:
             scaled = bool(enc_width and enc_height and (enc_width != ref_width or enc_height != ref_height))
-            await ffmpeg_service.decode_to_yuv420p(
+            frames_info = await ffmpeg_service.probe_video_frames(enc_input, input_format=enc_fmt)
+            enc_frames = len(frames_info["pkt_size"])
+
+        frames_used = min(ref_frames_total, enc_frames)
+        frame_mismatch = enc_frames != ref_frames_total
+
+        if not enc_is_yuv:
+            enc_yuv = Path("pipe:0")
+            decode_cmd = ffmpeg_service.build_decode_to_yuv420p_cmd(
                 enc_input,
-                enc_yuv,
+                "pipe:1",
                 input_format=enc_fmt,
                 scale_width=ref_width,
                 scale_height=ref_height,
-                add_command_callback=add_command_callback,
-                update_status_callback=update_status_callback,
-                command_type="bitstream_to_yuv",
-                source_file=str(enc_input),
+                max_frames=frames_used,
             )
 
-        enc_frames = _count_yuv420p_frames(enc_yuv, ref_width, ref_height)
-        frames_used = min(ref_frames_total, enc_frames)
-        frame_mismatch = enc_frames != ref_frames_total
-
         # 2.4 计算 PSNR / SSIM / VMAF(vmaf + vmaf_neg)
         psnr_log = analysis_dir / f"encoded_{idx+1}_psnr.log"
         ssim_log = analysis_dir / f"encoded_{idx+1}_ssim.log"
@@ -251,6 +265,7 @@ async def build_bitstream_report(
         raw_ref_args = [
             ffmpeg_service.ffmpeg_path,
             "-y",
+            *metric_thread_args(),
             "-f",
             "rawvideo",
             "-pix_fmt",
@@ -275,46 +290,18 @@ async def build_bitstream_report(
 
         limit_args = ["-frames:v", str(frames_used)] if frame_mismatch else []
 
-        await _run_logged(
-            raw_ref_args
-            + [
-                "-filter_complex",
-                f"psnr=stats_file={psnr_log}",
-            ]
-            + limit_args
-            + [
-                "-f",
-                "null",
-                "-",
-            ],
-            "psnr",
-        )
-        await _run_logged(
-            raw_ref_args
-            + [
-                "-filter_complex",
-                f"ssim=stats_file={ssim_log}",
-            ]
-            + limit_args
-            + [
-                "-f",
-                "null",
-                "-",
-            ],
-            "ssim",
-        )
-
         model_value = (
             "version=vmaf_v0.6.1\\:name=vmaf|version=vmaf_v0.6.1neg\\:name=vmaf_neg"
         )
         vmaf_filter = (
-            f"libvmaf='model={model_value}':n_threads=8:log_fmt=csv:log_path={vmaf_csv}"
+            f"libvmaf='model={model_value}':n_threads={metric_threads()}:log_fmt=csv:log_path={vmaf_csv}"
         )
+        # 三项指标融合进同一个滤镜图，yuv 只读取一遍
         await _run_logged(
             raw_ref_args
             + [
                 "-filter_complex",
-                vmaf_filter,
+                build_fused_metrics_filter(psnr_log, ssim_log, vmaf_filter),
             ]
             + limit_args
             + [
@@ -322,7 +309,8 @@ async def build_bitstream_report(
                 "null",
                 "-",
             ],
-            "vmaf",
+            "metrics",
+            decode_cmd,
         )
 
         psnr_data = parse_psnr_log(psnr_log)
@@ -337,7 +325,7 @@ async def build_bitstream_report(
             if vmaf_csv.exists():
                 vmaf_csv.unlink()
             # 清理转换后的 yuv
-            if enc_yuv.exists() and enc_yuv != enc_input:
+            if decode_cmd is None and enc_yuv != enc_input and enc_yuv.exists():
                 enc_yuv.unlink()
         except Exception:
             logger.warning("清理中间文件失败", exc_info=True)
@@ -353,19 +341,12 @@ async def build_bitstream_report(
             frame_sizes = [frame_size] * frames_used
             frame_timestamps = [i / ref_fps for i in range(frames_used)]
         else:
-            frames_info = await ffmpeg_service.probe_video_frames(enc_input, input_format=enc_fmt)
-            for i, fr in enumerate(frames_info):
-                frame_types.append((fr.get("pict_type") or "UNK"))
-                frame_sizes.append(int(fr.get("pkt_size") or 0))
-                ts = fr.get("timestamp")
-                frame_timestamps.append(float(ts) if ts is not None else (i / ref_fps))
-
-            if len(frame_sizes) > frames_used:
-                frame_types = frame_types[:frames_used]
-                frame_sizes = frame_sizes[:frames_used]
-                frame_timestamps = frame_timestamps[:frames_used]
-            elif len(frame_sizes) < frames_used:
-                frames_used = len(frame_sizes)
+            types = frames_info["pict_type"][:frames_used]
+            ts = frames_info["timestamp"][:frames_used]
+            ts = np.where(np.isnan(ts), np.arange(frames_used) / ref_fps, ts)
+            frame_types = np.where(types == "", "UNK", types).tolist()
+            frame_sizes = frames_info["pkt_size"][:frames_used].tolist()
+            frame_timestamps = ts.tolist()
 
         duration_seconds = frames_used / ref_fps
         avg_bitrate_bps = int((sum(frame_sizes) * 8) / duration_seconds) if duration_seconds > 0 else 0
@@ -4,20 +4,130 @@ FFmpeg 服务
 提供视频处理和质量指标计算功能
 """
 import asyncio
+import functools
 import json
+import os
 import subprocess
+import tempfile
 from pathlib import Path
 from typing import Any, Callable, Dict, List, Optional, Tuple
 
+import numpy as np
+import pandas as pd
+import psutil
+
 from src.config import settings
 from src.utils.metrics import parse_psnr_summary, parse_ssim_summary, parse_vmaf_summary
 
+# 失败时从 stderr 日志末尾读取的字节数
+STDERR_TAIL_BYTES = 8192
+# 进程间 rawvideo 管道的目标缓冲区大小（Linux 默认 64KB，不超过 /proc/sys/fs/pipe-max-size 的默认值）
+PIPE_BUFFER_SIZE = 1 << 20
+
 
 async def _wait_for_process(process, timeout: int) -> Tuple[bytes, bytes]:
     """等待进程完成，带超时"""
     return await asyncio.wait_for(process.communicate(), timeout=timeout)
 
 
+def _grow_pipe(fd: int, size: int = PIPE_BUFFER_SIZE) -> None:
+    """尽量调大管道缓冲区，减少大块数据传输时的 read/write 次数与唤醒；非 Linux 或受限时忽略"""
+    try:
+        import fcntl
+    except ImportError:
+        return
+    try:
+        fcntl.fcntl(fd, getattr(fcntl, "F_SETPIPE_SZ", 1031), size)
+    except OSError:
+        pass
+
+
+def _read_tail(f, n_bytes: int = STDERR_TAIL_BYTES) -> str:
+    """读取已打开二进制文件的末尾 n_bytes 字节"""
+    size = f.seek(0, os.SEEK_END)
+    f.seek(max(0, size - n_bytes))
+    return f.read().decode(errors="ignore")
+
+
+async def run_piped_with_stderr_tail(
+    producer_cmd: List[str], consumer_cmd: List[str], timeout: int
+) -> Tuple[int, str]:
+    """
+    producer 的 stdout 经 os.pipe 直连 consumer 的 stdin（如解码 -> 指标计算），
+    中间数据不落盘、也不经过 Python。stderr 处理同 run_with_stderr_tail。
+
+    两个进程都需成功；consumer 失败优先报告（producer 此时通常只是收到 EPIPE）。
+    """
+    read_fd, write_fd = os.pipe()
+    _grow_pipe(write_fd)
+    with tempfile.TemporaryFile() as producer_log, tempfile.TemporaryFile() as consumer_log:
+        try:
+            producer = await asyncio.create_subprocess_exec(
+                *producer_cmd,
+                stdout=write_fd,
+                stderr=producer_log,
+            )
+            try:
+                consumer = await asyncio.create_subprocess_exec(
+                    *consumer_cmd,
+                    stdin=read_fd,
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=consumer_log,
+                )
+            except Exception:
+                producer.kill()
+                await producer.wait()
+                raise
+        finally:
+            # 父进程不持有管道两端，producer/consumer 退出时对端才能收到 EOF/EPIPE
+            os.close(write_fd)
+            os.close(read_fd)
+
+        try:
+            await asyncio.wait_for(asyncio.gather(producer.wait(), consumer.wait()), timeout=timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            for process in (producer, consumer):
+                if process.returncode is None:
+                    process.kill()
+            await producer.wait()
+            await consumer.wait()
+            raise
+        if consumer.returncode != 0:
+            return consumer.returncode, _read_tail(consumer_log)
+        if producer.returncode != 0:
+            return producer.returncode, _read_tail(producer_log)
+        return 0, ""
+
+
+async def run_with_stderr_tail(cmd: List[str], timeout: int) -> Tuple[int, str]:
+    """
+    运行不需要 stdout 的命令，stderr 重定向到临时文件而非管道。
+
+    ffmpeg 长时间运行时 stderr 会持续输出进度行，管道捕获会在事件循环里累积全部字节；
+    这里仅在失败时读取日志末尾用于错误信息。超时会结束进程并抛出 asyncio.TimeoutError；
+    所在协程被取消时同样结束进程，避免遗留子进程。
+
+    Returns:
+        (returncode, stderr 末尾文本；成功时为空串)
+    """
+    with tempfile.TemporaryFile() as log:
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=log,
+        )
+        try:
+            await asyncio.wait_for(process.wait(), timeout=timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            if process.returncode is None:
+                process.kill()
+            await process.wait()
+            raise
+        if process.returncode == 0:
+            return 0, ""
+        return process.returncode, _read_tail(log)
+
+
 async def _run_ffmpeg_command(
     cmd: List[str],
     timeout: int,
@@ -31,23 +141,17 @@ async def _run_ffmpeg_command(
     """运行 FFmpeg 命令并统一处理状态上报/异常"""
     cmd_id = None
     if add_command_callback:
-        cmd_id = add_command_callback(command_type, " ".join(cmd), source_file)
+        cmd_id = add_command_callback(command_type, cmd, source_file)
     if update_status_callback and cmd_id:
         update_status_callback(cmd_id, "running")
 
     try:
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
+        returncode, stderr_tail = await run_with_stderr_tail(cmd, timeout)
 
-        stdout, stderr = await _wait_for_process(process, timeout)
-
-        if process.returncode != 0:
+        if returncode != 0:
             if update_status_callback and cmd_id:
-                update_status_callback(cmd_id, "failed", stderr.decode())
-            raise RuntimeError(f"{error_prefix}: {stderr.decode()}")
+                update_status_callback(cmd_id, "failed", stderr_tail)
+            raise RuntimeError(f"{error_prefix}: {stderr_tail}")
 
         result = on_success()
         if update_status_callback and cmd_id:
@@ -55,7 +159,6 @@ async def _run_ffmpeg_command(
         return result
 
     except asyncio.TimeoutError:
-        process.kill()
         if update_status_callback and cmd_id:
             update_status_callback(cmd_id, "failed", f"{error_prefix} timed out")
         raise RuntimeError(f"{error_prefix} timed out")
@@ -103,6 +206,44 @@ async def _run_metric_cmd(
     )
 
 
+def build_fused_metrics_filter(psnr_log: Path, ssim_log: Path, vmaf_filter: str) -> str:
+    """
+    构建 PSNR/SSIM/VMAF 融合滤镜图：一次解码同时计算三项指标
+
+    输入 0 为待测(distorted)，输入 1 为参考(reference)。参考流经 split 分三路；
+    psnr/ssim 会原样透传主输入帧，因此待测流依次串过 psnr -> ssim -> libvmaf，
+    整个图只有一个输出，无需额外 map。
+    """
+    return (
+        "[1:v]split=3[ref0][ref1][ref2];"
+        f"[0:v][ref0]psnr=stats_file={psnr_log}[dist1];"
+        f"[dist1][ref1]ssim=stats_file={ssim_log}[dist2];"
+        f"[dist2][ref2]{vmaf_filter}"
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def metric_threads() -> int:
+    """指标计算（psnr/ssim/libvmaf 滤镜）使用的线程数：默认物理核数"""
+    return psutil.cpu_count(logical=False) or os.cpu_count() or 1
+
+
+def metric_thread_args(threads: Optional[int] = None) -> List[str]:
+    """ffmpeg 滤镜线程参数（全局选项）；ffmpeg 默认的滤镜线程数常常只有 1"""
+    n = str(threads or metric_threads())
+    return ["-filter_threads", n, "-filter_complex_threads", n]
+
+
+def _vmaf_filter_expr(
+    output_log: Path, model_path: Optional[Path] = None, threads: Optional[int] = None
+) -> str:
+    """构建 libvmaf 滤镜参数（未提供模型时使用 FFmpeg 内置模型，日志为 csv）"""
+    n_threads = threads or metric_threads()
+    if model_path and model_path.exists():
+        return f"libvmaf=model_path={model_path}:log_path={output_log}:log_fmt=json:n_threads={n_threads}"
+    return f"libvmaf=log_path={output_log}:log_fmt=csv:n_threads={n_threads}"
+
+
 class FFmpegService:
     """FFmpeg 视频处理服务"""
 
@@ -126,6 +267,7 @@ class FFmpegService:
         ref_height: int = None,
         ref_fps: float = None,
         ref_pix_fmt: str = "yuv420p",
+        threads: Optional[int] = None,
     ) -> List[str]:
         """
         构建指标计算命令的公共部分
@@ -138,11 +280,12 @@ class FFmpegService:
             ref_height: 参考视频高度（YUV格式必需）
             ref_fps: 参考视频帧率（YUV格式必需）
             ref_pix_fmt: 参考视频像素格式
+            threads: 滤镜线程数（默认物理核数）
 
         Returns:
             命令列表
         """
-        cmd = [self.ffmpeg_path]
+        cmd = [self.ffmpeg_path] + metric_thread_args(threads)
 
         # 添加distorted视频输入
         cmd.extend(["-i", str(distorted_path)])
@@ -248,10 +391,10 @@ class FFmpegService:
         except Exception as e:
             raise RuntimeError(f"Failed to get video info: {str(e)}")
 
-    async def decode_to_yuv420p(
+    def build_decode_to_yuv420p_cmd(
         self,
         input_path: Path,
-        output_path: Path,
+        output: str,
         input_format: Optional[str] = None,
         input_width: Optional[int] = None,
         input_height: Optional[int] = None,
@@ -259,18 +402,13 @@ class FFmpegService:
         input_pix_fmt: str = "yuv420p",
         scale_width: Optional[int] = None,
         scale_height: Optional[int] = None,
-        add_command_callback=None,
-        update_status_callback=None,
-        command_type: str = "ffmpeg_decode",
-        source_file: Optional[str] = None,
-    ) -> None:
+        max_frames: Optional[int] = None,
+    ) -> List[str]:
         """
-        将输入视频解码为 yuv420p rawvideo。
+        构建解码为 yuv420p rawvideo 的命令（参数含义同 decode_to_yuv420p）
 
-        - 当 input_width/input_height 提供时，输入按 rawvideo 处理（通常用于 .yuv）。
-        - 当 input_format 提供时，强制指定输入格式（通常用于裸码流 h264/hevc 等）。
-        - 当 scale_width/scale_height 提供时，对输出进行缩放（用于与参考视频对齐分辨率）。
-        - add_command_callback/update_status_callback 可选，用于在任务日志中记录 ffmpeg 命令
+        output 可为文件路径或 "pipe:1"（写到 stdout，供下游 ffmpeg 直接读取）；
+        max_frames 限制输出帧数。
         """
         cmd: List[str] = [self.ffmpeg_path, "-y"]
 
@@ -292,32 +430,64 @@ class FFmpegService:
         vf_parts.append("format=yuv420p")
 
         cmd.extend(["-an", "-sn", "-vf", ",".join(vf_parts)])
-        cmd.extend(["-f", "rawvideo", "-pix_fmt", "yuv420p", str(output_path)])
+        if max_frames is not None:
+            cmd.extend(["-frames:v", str(max_frames)])
+        cmd.extend(["-f", "rawvideo", "-pix_fmt", "yuv420p", output])
+        return cmd
+
+    async def decode_to_yuv420p(
+        self,
+        input_path: Path,
+        output_path: Path,
+        input_format: Optional[str] = None,
+        input_width: Optional[int] = None,
+        input_height: Optional[int] = None,
+        input_fps: Optional[float] = None,
+        input_pix_fmt: str = "yuv420p",
+        scale_width: Optional[int] = None,
+        scale_height: Optional[int] = None,
+        add_command_callback=None,
+        update_status_callback=None,
+        command_type: str = "ffmpeg_decode",
+        source_file: Optional[str] = None,
+    ) -> None:
+        """
+        将输入视频解码为 yuv420p rawvideo。
+
+        - 当 input_width/input_height 提供时，输入按 rawvideo 处理（通常用于 .yuv）。
+        - 当 input_format 提供时，强制指定输入格式（通常用于裸码流 h264/hevc 等）。
+        - 当 scale_width/scale_height 提供时，对输出进行缩放（用于与参考视频对齐分辨率）。
+        - add_command_callback/update_status_callback 可选，用于在任务日志中记录 ffmpeg 命令
+        """
+        cmd = self.build_decode_to_yuv420p_cmd(
+            input_path,
+            str(output_path),
+            input_format=input_format,
+            input_width=input_width,
+            input_height=input_height,
+            input_fps=input_fps,
+            input_pix_fmt=input_pix_fmt,
+            scale_width=scale_width,
+            scale_height=scale_height,
+        )
 
         cmd_id = None
         if add_command_callback:
             cmd_id = add_command_callback(
                 command_type or "ffmpeg_decode",
-                " ".join(cmd),
+                cmd,
                 source_file or str(input_path),
             )
         if update_status_callback and cmd_id:
             update_status_callback(cmd_id, "running")
 
         try:
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
-            _, stderr = await _wait_for_process(process, settings.ffmpeg_timeout)
-            if process.returncode != 0:
-                error_msg = stderr.decode()
-                raise RuntimeError(f"Decode to yuv failed: {error_msg}")
+            returncode, stderr_tail = await run_with_stderr_tail(cmd, settings.ffmpeg_timeout)
+            if returncode != 0:
+                raise RuntimeError(f"Decode to yuv failed: {stderr_tail}")
             if update_status_callback and cmd_id:
                 update_status_callback(cmd_id, "completed")
         except asyncio.TimeoutError:
-            process.kill()
             if update_status_callback and cmd_id:
                 update_status_callback(cmd_id, "failed", "Decode to yuv timed out")
             raise RuntimeError("Decode to yuv timed out")
@@ -328,19 +498,20 @@ class FFmpegService:
 
     async def probe_video_frames(
         self, video_path: Path, input_format: Optional[str] = None
-    ) -> List[Dict[str, Any]]:
+    ) -> Dict[str, np.ndarray]:
         """
         使用 ffprobe 提取每一帧的基础信息（帧类型、包大小、时间戳）。
 
         Returns:
-            List[dict]: 每帧包含 index, pict_type, pkt_size, timestamp
+            按列组织的逐帧数组（长度均为帧数）：
+            pict_type(str，缺失为空串)、pkt_size(int64，缺失为 0)、timestamp(float64，缺失为 NaN)
         """
         cmd: List[str] = [
             self.ffprobe_path,
             "-v",
             "quiet",
             "-print_format",
-            "json",
+            "compact=p=0",
             "-select_streams",
             "v:0",
             "-show_frames",
@@ -351,47 +522,55 @@ class FFmpegService:
             cmd.extend(["-f", input_format])
         cmd.append(str(video_path))
 
-        try:
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
-            stdout, stderr = await _wait_for_process(process, settings.ffmpeg_timeout)
-            if process.returncode != 0:
-                raise RuntimeError(f"ffprobe failed: {stderr.decode()}")
-
-            payload = json.loads(stdout.decode())
-            frames = payload.get("frames", []) or []
-            results: List[Dict[str, Any]] = []
-
-            for idx, frame in enumerate(frames):
-                pkt_size = frame.get("pkt_size")
-                try:
-                    size_val = int(pkt_size) if pkt_size is not None else 0
-                except (TypeError, ValueError):
-                    size_val = 0
+        # 逐行流式读取 compact 输出（每帧一行 key=value|...），避免长视频下整段 JSON 的
+        # 大块内存分配与完整对象树；字段顺序由 ffprobe 决定，因此按 key 取值。
+        # 循环内只收集原始字符串，数值转换在结束后按列向量化完成
+        pict_types: List[Optional[str]] = []
+        pkt_sizes: List[Optional[str]] = []
+        best_effort_ts: List[Optional[str]] = []
+        pkt_pts: List[Optional[str]] = []
+
+        async def _read_frames(stdout) -> None:
+            async for raw_line in stdout:
+                line = raw_line.decode(errors="ignore").strip()
+                if not line:
+                    continue
+                frame = dict(item.partition("=")[::2] for item in line.split("|"))
+                pict_types.append(frame.get("pict_type"))
+                pkt_sizes.append(frame.get("pkt_size"))
+                best_effort_ts.append(frame.get("best_effort_timestamp_time"))
+                pkt_pts.append(frame.get("pkt_pts_time"))
 
-                ts_val = frame.get("best_effort_timestamp_time")
-                if ts_val is None:
-                    ts_val = frame.get("pkt_pts_time")
-
-                timestamp: Optional[float]
-                try:
-                    timestamp = float(ts_val) if ts_val is not None else None
-                except (TypeError, ValueError):
-                    timestamp = None
-
-                results.append(
-                    {
-                        "index": idx,
-                        "pict_type": frame.get("pict_type") or None,
-                        "pkt_size": size_val,
-                        "timestamp": timestamp,
-                    }
+        try:
+            with tempfile.TemporaryFile() as log:
+                process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=log,
                 )
-
-            return results
+                try:
+                    await asyncio.wait_for(
+                        asyncio.gather(_read_frames(process.stdout), process.wait()),
+                        timeout=settings.ffmpeg_timeout,
+                    )
+                except asyncio.TimeoutError:
+                    process.kill()
+                    await process.wait()
+                    raise
+                if process.returncode != 0:
+                    raise RuntimeError(f"ffprobe failed: {_read_tail(log)}")
+
+            # N/A、空串等非法值统一按缺失处理
+            sizes = pd.to_numeric(pd.Series(pkt_sizes, dtype=object), errors="coerce")
+            best = pd.to_numeric(pd.Series(best_effort_ts, dtype=object), errors="coerce").to_numpy(np.float64)
+            pts = pd.to_numeric(pd.Series(pkt_pts, dtype=object), errors="coerce").to_numpy(np.float64)
+            types = pd.Series(pict_types, dtype=object).fillna("")
+            types = types.where(types != "N/A", "")
+            return {
+                "pict_type": types.to_numpy(str),
+                "pkt_size": sizes.fillna(0).to_numpy(np.int64),
+                "timestamp": np.where(np.isnan(best), pts, best),
+            }
         except Exception as e:
             raise RuntimeError(f"Failed to probe frames: {str(e)}")
 
@@ -506,15 +685,9 @@ class FFmpegService:
         Returns:
             包含 vmaf_mean, vmaf_harmonic_mean 的字典
         """
-        # 构建VMAF滤镜参数
-        if model_path and model_path.exists():
-            vmaf_filter = f"libvmaf=model_path={model_path}:log_path={output_json}:log_fmt=json"
-        else:
-            vmaf_filter = f"libvmaf=log_path={output_json}:log_fmt=csv"
-
         cmd = self._build_metric_cmd(
             reference_path, distorted_path,
-            vmaf_filter,
+            _vmaf_filter_expr(output_json, model_path),
             ref_width, ref_height, ref_fps, ref_pix_fmt,
         )
         return await _run_metric_cmd(
@@ -523,6 +696,79 @@ class FFmpegService:
             command_type, source_file or str(distorted_path),
         )
 
+    async def calculate_all_metrics(
+        self,
+        reference_path: Path,
+        distorted_path: Path,
+        psnr_log: Path,
+        ssim_log: Path,
+        vmaf_log: Path,
+        model_path: Optional[Path] = None,
+        ref_width: int = None,
+        ref_height: int = None,
+        ref_fps: float = None,
+        ref_pix_fmt: str = "yuv420p",
+        add_command_callback=None,
+        update_status_callback=None,
+        command_type: str = "metrics",
+        source_file: Optional[str] = None,
+    ) -> Dict[str, Dict[str, float]]:
+        """
+        单个 ffmpeg 进程内同时计算 PSNR/SSIM/VMAF（参考与待测各只解码一次）
+
+        Args:
+            reference_path: 参考视频路径
+            distorted_path: 待测视频路径
+            psnr_log: PSNR 日志输出路径
+            ssim_log: SSIM 日志输出路径
+            vmaf_log: VMAF 日志输出路径
+            model_path: VMAF 模型文件路径（可选，不提供则使用FFmpeg内置模型）
+            ref_width: 参考视频宽度（YUV格式必需）
+            ref_height: 参考视频高度（YUV格式必需）
+            ref_fps: 参考视频帧率（YUV格式必需）
+            ref_pix_fmt: 参考视频像素格式
+
+        Returns:
+            {"psnr": {...}, "ssim": {...}, "vmaf": {...}}，各项内容与单项 calculate_* 的返回一致
+        """
+        cmd = self._build_metric_cmd(
+            reference_path, distorted_path,
+            build_fused_metrics_filter(psnr_log, ssim_log, _vmaf_filter_expr(vmaf_log, model_path)),
+            ref_width, ref_height, ref_fps, ref_pix_fmt,
+        )
+        return await _run_ffmpeg_command(
+            cmd=cmd,
+            timeout=settings.ffmpeg_timeout,
+            add_command_callback=add_command_callback,
+            update_status_callback=update_status_callback,
+            command_type=command_type,
+            source_file=source_file or str(distorted_path),
+            on_success=lambda: {
+                "psnr": parse_psnr_summary(psnr_log),
+                "ssim": parse_ssim_summary(ssim_log),
+                "vmaf": parse_vmaf_summary(vmaf_log),
+            },
+            error_prefix="Metrics calculation failed",
+        )
+
+    async def run_command(self, cmd: List[str], timeout: Optional[int] = None) -> None:
+        """
+        运行外部命令（如编码器命令行），不记录命令日志
+
+        Args:
+            cmd: 完整的命令列表
+            timeout: 超时秒数，默认 settings.ffmpeg_timeout
+
+        Raises:
+            RuntimeError: 命令超时或返回非 0（消息包含 stderr 末尾）
+        """
+        try:
+            returncode, stderr_tail = await run_with_stderr_tail(cmd, timeout or settings.ffmpeg_timeout)
+        except asyncio.TimeoutError:
+            raise RuntimeError("Command timed out")
+        if returncode != 0:
+            raise RuntimeError(f"Command failed: {stderr_tail}")
+
     async def encode_video(
         self,
         input_path: Path,
@@ -1,15 +1,18 @@
 """
 Metrics 分析模板执行器（单侧）
 """
-import json
+import asyncio
+import functools
 import platform
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
+import orjson
 import psutil
 
+from src.config import settings
 from src.models import CommandLog, CommandStatus
 from src.models_template import EncoderType, EncodingTemplate, TemplateSideConfig, TemplateType
 from src.services.storage import job_storage
@@ -28,7 +31,13 @@ from src.utils.encoding import (
 )
 
 
-def _env_info() -> Dict[str, str]:
+# 预热 CPU 占用率采样：interval=None 返回自上次调用以来的占用率，首次调用无意义
+psutil.cpu_percent(interval=None)
+
+
+@functools.lru_cache(maxsize=1)
+def _static_env() -> Dict[str, str]:
+    """进程生命周期内不变的环境信息（OS/CPU/核数/总内存），只采集一次"""
     info = {}
     try:
         info["os"] = platform.platform()
@@ -37,51 +46,84 @@ def _env_info() -> Dict[str, str]:
         info["phys_cores"] = str(psutil.cpu_count(logical=False) or "")
         info["log_cores"] = str(psutil.cpu_count(logical=True) or "")
         info["numa_nodes"] = ""
-        info["cpu_percent_start"] = str(psutil.cpu_percent(interval=0.1))
-        vm = psutil.virtual_memory()
-        info["mem_total"] = str(vm.total)
-        info["mem_available"] = str(vm.available)
+        info["mem_total"] = str(psutil.virtual_memory().total)
+    except Exception:
+        pass
+    return info
+
+
+def _env_info() -> Dict[str, str]:
+    info = dict(_static_env())
+    try:
+        # 非阻塞采样，避免在事件循环里 sleep
+        info["cpu_percent_start"] = str(psutil.cpu_percent(interval=None))
+        info["mem_available"] = str(psutil.virtual_memory().available)
     except Exception:
         pass
     return info
 
 
+def _encode_parallelism() -> int:
+    """并行编码数：优先取配置，否则按物理核数 / 4（每个编码进程通常自带多线程）"""
+    if settings.encode_parallelism > 0:
+        return settings.encode_parallelism
+    return max(1, (psutil.cpu_count(logical=False) or 1) // 4)
+
+
 async def _encode(config: TemplateSideConfig, sources: List[SourceInfo], job=None) -> Dict[str, List[Path]]:
-    outputs: Dict[str, List[Path]] = {}
     out_dir = Path(config.bitstream_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
-
-    for src in sources:
-        file_outputs: List[Path] = []
-        for val in config.bitrate_points or []:
-            stem = _build_output_stem(src.path, config.rate_control.value if config.rate_control else "rc", val)
-            if config.skip_encode:
-                matches = list(out_dir.glob(f"{stem}.*"))
-                if matches:
-                    file_outputs.append(matches[0])
-                    continue
-                raise FileNotFoundError(f"缺少码流: {stem}")
-
-            ext = _output_extension(config.encoder_type, src, is_container=not src.is_yuv and _is_container_file(src.path))
-            output_path = out_dir / f"{stem}{ext}"
-            cmd = _build_encode_cmd(
-                enc=config.encoder_type,
-                params=config.encoder_params or "",
-                rc=config.rate_control.value if config.rate_control else "rc",
-                val=val,
-                src=src,
-                output=output_path,
-            )
+    rc = config.rate_control.value if config.rate_control else "rc"
+    sem = asyncio.Semaphore(_encode_parallelism())
+
+    async def _encode_one(src: SourceInfo, val: float) -> Path:
+        stem = _build_output_stem(src.path, rc, val)
+        if config.skip_encode:
+            matches = list(out_dir.glob(f"{stem}.*"))
+            if matches:
+                return matches[0]
+            raise FileNotFoundError(f"缺少码流: {stem}")
+
+        ext = _output_extension(config.encoder_type, src, is_container=not src.is_yuv and _is_container_file(src.path))
+        output_path = out_dir / f"{stem}{ext}"
+        cmd = _build_encode_cmd(
+            enc=config.encoder_type,
+            params=config.encoder_params or "",
+            rc=rc,
+            val=val,
+            src=src,
+            output=output_path,
+        )
+        async with sem:
             log = _start_command(job, "encode", cmd, source_file=str(src.path), storage=job_storage)
             try:
                 await ffmpeg_service.run_command(cmd)
                 _finish_command(job, log, CommandStatus.COMPLETED, storage=job_storage)
+            except asyncio.CancelledError:
+                # 其他编码失败导致取消：进程已由 run_command 结束，命令日志不能停留在 running
+                _finish_command(job, log, CommandStatus.FAILED, storage=job_storage, error="cancelled")
+                raise
             except Exception as exc:
                 _finish_command(job, log, CommandStatus.FAILED, storage=job_storage, error=str(exc))
                 raise
-            file_outputs.append(output_path)
-        outputs[src.path.stem] = file_outputs
-    return outputs
+        return output_path
+
+    # 所有 (源, 点位) 并发编码，由信号量限制同时运行的进程数；gather 保持提交顺序
+    points = list(config.bitrate_points or [])
+    tasks = [asyncio.ensure_future(_encode_one(src, val)) for src in sources for val in points]
+    try:
+        results = await asyncio.gather(*tasks)
+    except BaseException:
+        # gather 不会取消其余任务：首个失败（或外部取消）时取消全部未完成的编码并等待其收尾，
+        # 避免任务已失败后仍有排队的编码启动新进程、在 batch() 之外写元数据
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    return {
+        src.path.stem: list(results[i * len(points):(i + 1) * len(points)])
+        for i, src in enumerate(sources)
+    }
 
 
 async def _analyze_single(
@@ -108,6 +150,11 @@ async def _analyze_single(
 
 class MetricsAnalysisRunner:
     async def execute(self, template: EncodingTemplate, job=None) -> Dict[str, Any]:
+        # 每条命令的状态变化都会 update_job，合并为节流写入
+        async with job_storage.batch(job):
+            return await self._execute(template, job)
+
+    async def _execute(self, template: EncodingTemplate, job=None) -> Dict[str, Any]:
         if template.metadata.template_type != TemplateType.METRICS_ANALYSIS:
             raise ValueError("模板类型不匹配")
         config = template.metadata.anchor
@@ -116,26 +163,28 @@ class MetricsAnalysisRunner:
         ordered_sources = sorted(sources, key=lambda s: s.path.name)
 
         # 准备命令日志回调
-        def _add_cmd(command_type: str, command: str, source_file: str = None):
-            import shlex
-            cmd = shlex.split(command)
+        logs_by_id: Dict[str, CommandLog] = {}
+
+        def _add_cmd(command_type: str, cmd: List[str], source_file: str = None):
             log = _start_command(job, command_type, cmd, source_file=source_file, storage=job_storage)
-            return log.command_id if log else None
+            if not log:
+                return None
+            logs_by_id[log.command_id] = log
+            return log.command_id
 
         def _update_cmd(command_id: str, status: str, error: str = None):
             if not job:
                 return
-            for cmd_log in job.metadata.command_logs:
-                if cmd_log.command_id == command_id:
-                    cmd_log.status = CommandStatus(status)
-                    now = _now()
-                    if status == "running":
-                        cmd_log.started_at = now
-                    else:
-                        cmd_log.completed_at = now
-                    if error:
-                        cmd_log.error_message = error
-                    break
+            cmd_log = logs_by_id.get(command_id)
+            if cmd_log is not None:
+                cmd_log.status = CommandStatus(status)
+                now = _now()
+                if status == "running":
+                    cmd_log.started_at = now
+                else:
+                    cmd_log.completed_at = now
+                if error:
+                    cmd_log.error_message = error
             try:
                 job_storage.update_job(job)
             except Exception:
@@ -177,8 +226,12 @@ class MetricsAnalysisRunner:
 
         data_path = analysis_root / "analyse_data.json"
         try:
-            with open(data_path, "w", encoding="utf-8") as f:
-                json.dump(result, f, ensure_ascii=False, indent=2)
+            data_path.write_bytes(
+                orjson.dumps(
+                    result,
+                    option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+                )
+            )
             if job:
                 result["data_file"] = str(data_path.relative_to(job.job_dir))
             else:
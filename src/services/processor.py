@@ -4,12 +4,12 @@
 处理视频质量指标计算任务
 """
 import asyncio
-import json
 import logging
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
+import orjson
 from nanoid import generate
 
 from src.models import Job, JobMode, JobStatus, MetricsResult
@@ -24,12 +24,12 @@ def _now_tz():
 def _make_command_callbacks(job, job_storage):
     from src.models import CommandLog, CommandStatus
 
-    def add_command_log(command_type: str, command: str, source_file: str = None) -> str:
+    def add_command_log(command_type: str, cmd: List[str], source_file: str = None) -> str:
         command_id = generate(size=8)
         log = CommandLog(
             command_id=command_id,
             command_type=command_type,
-            command=command,
+            command=" ".join(cmd),
             status=CommandStatus.PENDING,
             source_file=source_file,
         )
@@ -223,8 +223,12 @@ class TaskProcessor:
 
         report_path = job.job_dir / report_rel_path
         report_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(report_path, "w", encoding="utf-8") as f:
-            json.dump(report_data, f, ensure_ascii=False, indent=2)
+        report_path.write_bytes(
+            orjson.dumps(
+                report_data,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+            )
+        )
 
         job.metadata.execution_result = summary
         job_storage.update_job(job)
@@ -256,41 +260,54 @@ class TaskProcessor:
         vmaf_json = job.job_dir / "vmaf.json"
 
         try:
-            # 并行计算 PSNR、SSIM、VMAF
             logger.info(f"Calculating metrics for job {job.job_id}")
-
-            psnr_task = ffmpeg_service.calculate_psnr(
-                reference_path,
-                distorted_path,
-                psnr_log,
-                add_command_callback=add_command_callback,
-                update_status_callback=update_status_callback,
-                command_type="psnr",
-                source_file=str(distorted_path),
-            )
-            ssim_task = ffmpeg_service.calculate_ssim(
-                reference_path,
-                distorted_path,
-                ssim_log,
-                add_command_callback=add_command_callback,
-                update_status_callback=update_status_callback,
-                command_type="ssim",
-                source_file=str(distorted_path),
-            )
-            vmaf_task = ffmpeg_service.calculate_vmaf(
-                reference_path,
-                distorted_path,
-                vmaf_json,
-                add_command_callback=add_command_callback,
-                update_status_callback=update_status_callback,
-                command_type="vmaf",
-                source_file=str(distorted_path),
-            )
-
-            # 等待所有指标计算完成
-            psnr_result, ssim_result, vmaf_result = await asyncio.gather(
-                psnr_task, ssim_task, vmaf_task, return_exceptions=True
-            )
+            try:
+                # 单进程融合计算：参考与待测只解码一次
+                fused = await ffmpeg_service.calculate_all_metrics(
+                    reference_path,
+                    distorted_path,
+                    psnr_log,
+                    ssim_log,
+                    vmaf_json,
+                    add_command_callback=add_command_callback,
+                    update_status_callback=update_status_callback,
+                    command_type="metrics",
+                    source_file=str(distorted_path),
+                )
+                psnr_result, ssim_result, vmaf_result = fused["psnr"], fused["ssim"], fused["vmaf"]
+            except Exception as e:
+                # 融合失败（如 ffmpeg 未编译 libvmaf）时回退为单项并行计算，保留已成功的指标
+                logger.warning(f"Fused metrics calculation failed, falling back to per-metric runs: {e}")
+                psnr_task = ffmpeg_service.calculate_psnr(
+                    reference_path,
+                    distorted_path,
+                    psnr_log,
+                    add_command_callback=add_command_callback,
+                    update_status_callback=update_status_callback,
+                    command_type="psnr",
+                    source_file=str(distorted_path),
+                )
+                ssim_task = ffmpeg_service.calculate_ssim(
+                    reference_path,
+                    distorted_path,
+                    ssim_log,
+                    add_command_callback=add_command_callback,
+                    update_status_callback=update_status_callback,
+                    command_type="ssim",
+                    source_file=str(distorted_path),
+                )
+                vmaf_task = ffmpeg_service.calculate_vmaf(
+                    reference_path,
+                    distorted_path,
+                    vmaf_json,
+                    add_command_callback=add_command_callback,
+                    update_status_callback=update_status_callback,
+                    command_type="vmaf",
+                    source_file=str(distorted_path),
+                )
+                psnr_result, ssim_result, vmaf_result = await asyncio.gather(
+                    psnr_task, ssim_task, vmaf_task, return_exceptions=True
+                )
 
             # 处理 PSNR 结果
             if isinstance(psnr_result, dict):
@@ -3,15 +3,65 @@
 
 负责任务元数据的持久化和检索（使用文件系统 + JSON）
 """
-import json
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional
+from typing import AsyncIterator, Dict, List, NamedTuple, Optional, Tuple
 
+import orjson
 from nanoid import generate
+from sortedcontainers import SortedKeyList
 
 from src.config import settings
-from src.models import Job, JobMetadata, JobStatus
+from src.models import Job, JobMetadata, JobMode, JobStatus
+
+# get_job 缓存的任务数量上限
+JOB_CACHE_SIZE = 512
+
+# 超过该数量的元数据文件改为线程池并发读取，重叠冷缓存下的磁盘等待
+BATCH_READ_THRESHOLD = 8
+BATCH_READ_WORKERS = 8
+
+# batch() 期间元数据落盘的最小间隔（秒）
+BATCH_FLUSH_INTERVAL = 0.5
+
+
+def _read_bytes_or_none(path: Path) -> Optional[bytes]:
+    try:
+        return path.read_bytes()
+    except OSError:
+        return None
+
+
+def _read_many(paths: List[Path]) -> List[Optional[bytes]]:
+    """批量读取文件内容，读取失败的位置为 None"""
+    if len(paths) <= BATCH_READ_THRESHOLD:
+        return [_read_bytes_or_none(p) for p in paths]
+    with ThreadPoolExecutor(max_workers=BATCH_READ_WORKERS) as pool:
+        return list(pool.map(_read_bytes_or_none, paths))
+
+
+class JobIndexEntry(NamedTuple):
+    """任务索引项（列表查询所需的轻量字段）"""
+
+    job_id: str
+    status: JobStatus
+    mode: JobMode
+    created_at: datetime
+
+    @classmethod
+    def from_metadata(cls, metadata: JobMetadata) -> "JobIndexEntry":
+        return cls(metadata.job_id, metadata.status, metadata.mode, metadata.created_at)
+
+
+def _index_sort_key(entry: JobIndexEntry):
+    """索引排序键：创建时间倒序"""
+    return (-entry.created_at.timestamp(), entry.job_id)
 
 
 class JobStorage:
@@ -27,6 +77,24 @@ class JobStorage:
         self.root_dir = (root_dir or settings.jobs_root_dir).resolve()
         self.root_dir.mkdir(parents=True, exist_ok=True)
 
+        # 内存索引：首次使用时扫描目录构建，之后随增删改同步维护
+        self._index: Optional[Dict[str, JobIndexEntry]] = None
+        self._sorted_index: SortedKeyList = SortedKeyList(key=_index_sort_key)
+        self._status_index: Dict[JobStatus, SortedKeyList] = {
+            s: SortedKeyList(key=_index_sort_key) for s in JobStatus
+        }
+        self._index_lock = threading.Lock()
+        # 索引版本：任何任务增删改都会递增；epoch 区分进程，避免重启后版本号复用
+        self._index_epoch = generate(size=8)
+        self._index_revision = 0
+
+        # get_job 缓存：job_id -> ((mtime_ns, size), Job)，元数据文件变化即失效
+        self._job_cache: "OrderedDict[str, Tuple[Tuple[int, int], Job]]" = OrderedDict()
+        self._job_cache_lock = threading.Lock()
+
+        # batch() 中的任务：job_id -> 是否有未落盘的修改
+        self._batch_dirty: Dict[str, bool] = {}
+
     def create_job(self, metadata: JobMetadata) -> Job:
         """
         创建新任务
@@ -51,6 +119,7 @@ class JobStorage:
         # 保存元数据
         job = Job(metadata=metadata, job_dir=job_dir)
         self._save_metadata(job)
+        self._index_put(metadata)
 
         return job
 
@@ -62,25 +131,34 @@ class JobStorage:
             job_id: 任务 ID
 
         Returns:
-            Job 对象，如果不存在则返回 None
+            Job 对象，如果不存在则返回 None；元数据文件未变化时返回缓存中的同一对象，
+            修改后需调用 update_job 持久化
         """
         job_dir = self.root_dir / job_id
+        metadata_path = job_dir / "metadata.json"
 
-        if not job_dir.exists():
+        try:
+            st = os.stat(metadata_path)
+        except OSError:
             return None
+        signature = (st.st_mtime_ns, st.st_size)
 
-        metadata_path = job_dir / "metadata.json"
-        if not metadata_path.exists():
-            return None
+        with self._job_cache_lock:
+            cached = self._job_cache.get(job_id)
+            if cached is not None and cached[0] == signature:
+                self._job_cache.move_to_end(job_id)
+                return cached[1]
 
         try:
-            with open(metadata_path, "r", encoding="utf-8") as f:
-                metadata_dict = json.load(f)
-                metadata = JobMetadata(**metadata_dict)
-                return Job(metadata=metadata, job_dir=job_dir)
+            metadata_dict = orjson.loads(metadata_path.read_bytes())
+            metadata = JobMetadata(**metadata_dict)
+            job = Job(metadata=metadata, job_dir=job_dir)
         except Exception:
             return None
 
+        self._cache_job(job, signature)
+        return job
+
     def update_job(self, job: Job) -> None:
         """
         更新任务元数据
@@ -89,12 +167,61 @@ class JobStorage:
             job: 任务对象
         """
         job.metadata.updated_at = datetime.utcnow()
+        if job.job_id in self._batch_dirty:
+            self._batch_dirty[job.job_id] = True
+            return
         self._save_metadata(job)
+        self._index_put(job.metadata)
+
+    @asynccontextmanager
+    async def batch(self, job: Optional[Job]) -> AsyncIterator[None]:
+        """
+        合并任务元数据写入
+
+        期间对该任务的 update_job 只标记修改，由后台协程每 BATCH_FLUSH_INTERVAL 秒
+        最多落盘一次（页面轮询仍能看到进度），退出时补写剩余修改。job 为 None 时不做处理。
+        """
+        if job is None:
+            yield
+            return
+
+        job_id = job.job_id
+        self._batch_dirty[job_id] = False
+
+        async def _flusher() -> None:
+            while True:
+                await asyncio.sleep(BATCH_FLUSH_INTERVAL)
+                self._flush_batch(job)
+
+        task = asyncio.create_task(_flusher())
+        try:
+            yield
+        finally:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            self._flush_batch(job)
+            self._batch_dirty.pop(job_id, None)
+
+    def _flush_batch(self, job: Job) -> None:
+        """将 batch() 中累积的修改落盘"""
+        if not self._batch_dirty.get(job.job_id):
+            return
+        self._batch_dirty[job.job_id] = False
+        try:
+            self._save_metadata(job)
+            self._index_put(job.metadata)
+        except Exception:
+            # 写入失败时保留脏标记，下次刷新重试
+            self._batch_dirty[job.job_id] = True
 
     def list_jobs(
         self,
         status: Optional[JobStatus] = None,
         limit: Optional[int] = None,
+        offset: int = 0,
     ) -> List[Job]:
         """
         列出所有任务
@@ -102,46 +229,58 @@ class JobStorage:
         Args:
             status: 可选的状态过滤
             limit: 可选的数量限制
+            offset: 跳过的任务数量（分页）
 
         Returns:
             任务列表，按创建时间倒序排列
         """
         jobs: List[Job] = []
 
-        # 遍历所有子目录
-        if not self.root_dir.exists():
-            return jobs
-
-        for job_dir in self.root_dir.iterdir():
-            if not job_dir.is_dir():
+        # 仅为命中的索引项加载完整元数据
+        job_dirs = [self.root_dir / entry.job_id for entry in self._select_entries(status, limit, offset)]
+        for job_dir, raw in zip(job_dirs, _read_many([d / "metadata.json" for d in job_dirs])):
+            if raw is None:
                 continue
-
-            metadata_path = job_dir / "metadata.json"
-            if not metadata_path.exists():
+            try:
+                metadata = JobMetadata(**orjson.loads(raw))
+            except Exception:
                 continue
+            jobs.append(Job(metadata=metadata, job_dir=job_dir))
 
-            try:
-                with open(metadata_path, "r", encoding="utf-8") as f:
-                    metadata_dict = json.load(f)
-                    metadata = JobMetadata(**metadata_dict)
+        return jobs
 
-                    # 状态过滤
-                    if status and metadata.status != status:
-                        continue
+    def list_job_entries(
+        self,
+        status: Optional[JobStatus] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> List[JobIndexEntry]:
+        """
+        列出任务索引项（不读取元数据文件）
 
-                    jobs.append(Job(metadata=metadata, job_dir=job_dir))
-            except Exception:
-                # 跳过无效的元数据文件
-                continue
+        Args:
+            status: 可选的状态过滤
+            limit: 可选的数量限制
+            offset: 跳过的任务数量（分页）
+
+        Returns:
+            索引项列表，按创建时间倒序排列
+        """
+        return self._select_entries(status, limit, offset)
 
-        # 按创建时间倒序排列
-        jobs.sort(key=lambda j: j.metadata.created_at, reverse=True)
+    def count_jobs(self, status: Optional[JobStatus] = None) -> int:
+        """
+        统计任务数量
 
-        # 应用数量限制
-        if limit:
-            jobs = jobs[:limit]
+        Args:
+            status: 可选的状态过滤
 
-        return jobs
+        Returns:
+            任务数量
+        """
+        self._ensure_index()
+        with self._index_lock:
+            return len(self._sorted_for(status))
 
     def delete_job(self, job_id: str) -> bool:
         """
@@ -163,10 +302,23 @@ class JobStorage:
             import shutil
 
             shutil.rmtree(job_dir)
+            self._index_remove(job_id)
+            with self._job_cache_lock:
+                self._job_cache.pop(job_id, None)
             return True
         except Exception:
             return False
 
+    def list_version(self) -> str:
+        """
+        任务列表版本标识（用于列表接口的 ETag）
+
+        Returns:
+            任意任务变更后都会改变的字符串
+        """
+        self._ensure_index()
+        return f"{self._index_epoch}-{self._index_revision}"
+
     def generate_job_id(self) -> str:
         """
         生成唯一的任务 ID
@@ -176,6 +328,80 @@ class JobStorage:
         """
         return generate(size=12)
 
+    def _ensure_index(self) -> Dict[str, JobIndexEntry]:
+        """构建内存索引（扫描任务目录一次）"""
+        if self._index is not None:
+            return self._index
+
+        with self._index_lock:
+            if self._index is not None:
+                return self._index
+
+            index: Dict[str, JobIndexEntry] = {}
+            # os.scandir 直接复用 readdir 返回的 d_type，无需逐项 stat 或构造 Path
+            with os.scandir(self.root_dir) as it:
+                metadata_paths = [
+                    Path(entry.path) / "metadata.json"
+                    for entry in it
+                    if entry.is_dir()
+                ]
+            for raw in _read_many(metadata_paths):
+                if raw is None:
+                    continue
+
+                try:
+                    metadata = JobMetadata(**orjson.loads(raw))
+                except Exception:
+                    # 跳过无效的元数据文件
+                    continue
+                index[metadata.job_id] = JobIndexEntry.from_metadata(metadata)
+
+            self._sorted_index.update(index.values())
+            for entry in index.values():
+                self._status_index[entry.status].add(entry)
+            self._index = index
+            return index
+
+    def _sorted_for(self, status: Optional[JobStatus]) -> SortedKeyList:
+        """取对应状态的有序索引（None 表示全部任务）"""
+        return self._sorted_index if status is None else self._status_index[status]
+
+    def _select_entries(
+        self, status: Optional[JobStatus] = None, limit: Optional[int] = None, offset: int = 0
+    ) -> List[JobIndexEntry]:
+        """按创建时间倒序取出 [offset, offset + limit) 区间的索引项"""
+        self._ensure_index()
+        stop = offset + limit if limit else None
+        with self._index_lock:
+            return list(self._sorted_for(status).islice(offset, stop))
+
+    def _index_put(self, metadata: JobMetadata) -> None:
+        """新增或刷新索引项"""
+        self._ensure_index()
+        entry = JobIndexEntry.from_metadata(metadata)
+        with self._index_lock:
+            old = self._index.get(entry.job_id)
+            if old == entry:
+                return
+            if old is not None:
+                self._sorted_index.remove(old)
+                self._status_index[old.status].remove(old)
+            self._index[entry.job_id] = entry
+            self._sorted_index.add(entry)
+            self._status_index[entry.status].add(entry)
+            self._index_revision += 1
+
+    def _index_remove(self, job_id: str) -> None:
+        """移除索引项"""
+        if self._index is None:
+            return
+        with self._index_lock:
+            old = self._index.pop(job_id, None)
+            if old is not None:
+                self._sorted_index.remove(old)
+                self._status_index[old.status].remove(old)
+                self._index_revision += 1
+
     def _save_metadata(self, job: Job) -> None:
         """
         保存任务元数据到 JSON 文件
@@ -185,10 +411,21 @@ class JobStorage:
         """
         metadata_path = job.get_metadata_path()
 
-        with open(metadata_path, "w", encoding="utf-8") as f:
-            # 使用 Pydantic 的 model_dump 方法序列化
-            metadata_dict = job.metadata.model_dump(mode="json")
-            json.dump(metadata_dict, f, ensure_ascii=False, indent=2)
+        # 使用 Pydantic 的 model_dump 方法序列化
+        metadata_dict = job.metadata.model_dump(mode="json")
+        metadata_path.write_bytes(orjson.dumps(metadata_dict, option=orjson.OPT_INDENT_2))
+
+        # 本进程写入后直接刷新缓存，下次 get_job 无需重新解析
+        st = os.stat(metadata_path)
+        self._cache_job(job, (st.st_mtime_ns, st.st_size))
+
+    def _cache_job(self, job: Job, signature: Tuple[int, int]) -> None:
+        """写入 get_job 缓存（LRU 淘汰）"""
+        with self._job_cache_lock:
+            self._job_cache[job.job_id] = (signature, job)
+            self._job_cache.move_to_end(job.job_id)
+            if len(self._job_cache) > JOB_CACHE_SIZE:
+                self._job_cache.popitem(last=False)
 
 
 # 全局单例
@@ -4,7 +4,6 @@
 尽量复用现有码流分析逻辑，允许破坏式实现。
 """
 import asyncio
-import json
 import platform
 import re
 import time
@@ -15,6 +14,7 @@ from typing import Any, Dict, List, Optional, Tuple
 
 import psutil
 import numpy as np
+import orjson
 
 from src.models import CommandLog, CommandStatus
 from src.models_template import EncoderType, EncodingTemplate, TemplateSideConfig
@@ -391,6 +391,52 @@ async def _encode_side(
     return outputs, perf_data
 
 
+# 逐帧码率数据的二进制旁路文件（与 report_data.json 同目录）
+FRAMES_SIDECAR_NAME = "frames.npz"
+
+
+def _write_frames_sidecar(entries: List[Dict[str, Any]], path: Path) -> bool:
+    """
+    将各编码结果的 frame_sizes / frame_timestamps 拼接写入 npz 旁路文件，
+    写入成功后再从报告条目中移除这两个数组，避免 JSON 中携带大量逐帧数值。
+
+    文件内容：video / side / label 为每个编码结果的键，offsets 为其在 t / size 中的起止位置。
+    """
+    items: List[Tuple[str, str, str, Dict[str, Any]]] = []
+    ts_parts: List[np.ndarray] = []
+    size_parts: List[np.ndarray] = []
+    offsets = [0]
+    for entry in entries:
+        for side_key in ("anchor", "test"):
+            for item in (entry.get(side_key) or {}).get("encoded") or []:
+                bitrate = item.get("bitrate") or {}
+                sizes = bitrate.get("frame_sizes")
+                ts = bitrate.get("frame_timestamps")
+                if sizes is None or ts is None:
+                    continue
+                n = min(len(sizes), len(ts))
+                items.append((entry.get("source") or "", side_key, item.get("label") or "", bitrate))
+                ts_parts.append(np.asarray(ts[:n], dtype=np.float64))
+                size_parts.append(np.asarray(sizes[:n], dtype=np.int64))
+                offsets.append(offsets[-1] + n)
+    if not items:
+        return False
+
+    np.savez(
+        path,
+        video=np.array([v for v, _, _, _ in items], dtype=str),
+        side=np.array([s for _, s, _, _ in items], dtype=str),
+        label=np.array([lb for _, _, lb, _ in items], dtype=str),
+        offsets=np.asarray(offsets, dtype=np.int64),
+        t=np.concatenate(ts_parts),
+        size=np.concatenate(size_parts),
+    )
+    for _, _, _, bitrate in items:
+        bitrate.pop("frame_sizes", None)
+        bitrate.pop("frame_timestamps", None)
+    return True
+
+
 def _extract_bitrate_point(path: Path) -> Optional[float]:
     stem = path.stem
     parts = stem.split("_")
@@ -406,13 +452,13 @@ async def run_template(
     template: EncodingTemplate,
     job=None,
 ) -> Dict[str, Any]:
-    def _add_cmd(cmd_type: str, command: str, source_file: Optional[str] = None) -> Optional[str]:
+    def _add_cmd(cmd_type: str, cmd: List[str], source_file: Optional[str] = None) -> Optional[str]:
         if not job:
             return None
         log = CommandLog(
             command_id=f"{len(job.metadata.command_logs)+1}",
             command_type=cmd_type,
-            command=command,
+            command=" ".join(cmd),
             status=CommandStatus.PENDING,
             source_file=source_file,
         )
@@ -665,9 +711,15 @@ async def run_template(
     report_dir.mkdir(parents=True, exist_ok=True)
     report_path = report_dir / "report_data.json"
     try:
-        with open(report_path, "w", encoding="utf-8") as f:
-            # 使用紧凑格式减小文件体积（无缩进，无多余空格）
-            json.dump(result, f, ensure_ascii=False, separators=(",", ":"))
+        _write_frames_sidecar(report_entries, report_dir / FRAMES_SIDECAR_NAME)
+    except Exception:
+        # 旁路文件写入失败时逐帧数据保留在 JSON 中，页面按原方式读取
+        pass
+    try:
+        # orjson 默认即紧凑格式（无缩进，无多余空格）
+        report_path.write_bytes(
+            orjson.dumps(result, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+        )
         if job:
             result["report_data_file"] = str(report_path.relative_to(job.job_dir))
         else:
@@ -3,15 +3,23 @@
 
 负责转码模板元数据的持久化和检索（使用文件系统 + JSON）
 """
-import json
-from datetime import datetime
 from pathlib import Path
 from typing import List, Optional
 
+import orjson
 from nanoid import generate
 
 from src.config import settings
-from src.models_template import EncodingTemplate, EncodingTemplateMetadata, TemplateType
+from src.models_template import (
+    TEMPLATE_LIST_ADAPTER,
+    EncodingTemplate,
+    EncodingTemplateMetadata,
+    TemplateType,
+    utc_now,
+)
+
+# 从磁盘加载已持久化模板时的校验上下文
+_LOAD_CONTEXT = {"skip_path_check": True}
 
 
 class TemplateStorage:
@@ -74,10 +82,9 @@ class TemplateStorage:
             return None
 
         try:
-            with open(metadata_path, "r", encoding="utf-8") as f:
-                metadata_dict = json.load(f)
-                metadata = EncodingTemplateMetadata.model_validate(metadata_dict, context={"skip_path_check": True})
-                return EncodingTemplate(metadata=metadata, template_dir=template_dir)
+            metadata_dict = orjson.loads(metadata_path.read_bytes())
+            metadata = EncodingTemplateMetadata.model_validate(metadata_dict, context=_LOAD_CONTEXT)
+            return EncodingTemplate(metadata=metadata, template_dir=template_dir)
         except Exception:
             return None
 
@@ -88,7 +95,7 @@ class TemplateStorage:
         Args:
             template: 模板对象
         """
-        template.metadata.updated_at = datetime.utcnow()
+        template.metadata.updated_at = utc_now()
         self._save_metadata(template)
 
     def list_templates(
@@ -112,26 +119,24 @@ class TemplateStorage:
         if not self.root_dir.exists():
             return templates
 
+        template_dirs: List[Path] = []
+        raws: List[bytes] = []
         for template_dir in self.root_dir.iterdir():
             if not template_dir.is_dir():
                 continue
 
-            metadata_path = template_dir / "template.json"
-            if not metadata_path.exists():
+            try:
+                raws.append((template_dir / "template.json").read_bytes())
+            except OSError:
                 continue
+            template_dirs.append(template_dir)
 
-            try:
-                with open(metadata_path, "r", encoding="utf-8") as f:
-                    metadata_dict = json.load(f)
-                    metadata = EncodingTemplateMetadata(**metadata_dict)
-
-                    if template_type is None or metadata.template_type == template_type:
-                        templates.append(
-                            EncodingTemplate(metadata=metadata, template_dir=template_dir)
-                        )
-            except Exception:
-                # 跳过无效的元数据文件
+        for template_dir, metadata in zip(template_dirs, self._validate_many(raws)):
+            # 跳过无效的元数据文件
+            if metadata is None:
                 continue
+            if template_type is None or metadata.template_type == template_type:
+                templates.append(EncodingTemplate(metadata=metadata, template_dir=template_dir))
 
         # 按创建时间倒序排列
         templates.sort(key=lambda t: t.metadata.created_at, reverse=True)
@@ -174,6 +179,32 @@ class TemplateStorage:
         """
         return generate(size=12)
 
+    @staticmethod
+    def _validate_many(raws: List[bytes]) -> List[Optional[EncodingTemplateMetadata]]:
+        """
+        批量校验模板 JSON：整体拼成数组一次校验，失败时逐个校验以定位无效文件
+
+        Returns:
+            与 raws 一一对应的元数据，无效项为 None
+        """
+        if not raws:
+            return []
+        try:
+            batch = TEMPLATE_LIST_ADAPTER.validate_json(b"[" + b",".join(raws) + b"]", context=_LOAD_CONTEXT)
+            # 个别文件若本身含逗号分隔的多个值会导致错位，此时回退逐个校验
+            if len(batch) == len(raws):
+                return batch
+        except Exception:
+            pass
+
+        results: List[Optional[EncodingTemplateMetadata]] = []
+        for raw in raws:
+            try:
+                results.append(EncodingTemplateMetadata.model_validate_json(raw, context=_LOAD_CONTEXT))
+            except Exception:
+                results.append(None)
+        return results
+
     def _save_metadata(self, template: EncodingTemplate) -> None:
         """
         保存模板元数据到 JSON 文件
@@ -183,9 +214,8 @@ class TemplateStorage:
         """
         metadata_path = template.get_metadata_path()
 
-        with open(metadata_path, "w", encoding="utf-8") as f:
-            metadata_dict = template.metadata.model_dump(mode="json")
-            json.dump(metadata_dict, f, ensure_ascii=False, indent=2)
+        metadata_dict = template.metadata.model_dump(mode="json")
+        metadata_path.write_bytes(orjson.dumps(metadata_dict, option=orjson.OPT_INDENT_2))
 
 
 # 全局单例
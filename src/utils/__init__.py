@@ -1,10 +1,12 @@
 """通用工具函数导出"""
 from .file_utils import (
     extract_video_info,
+    extract_video_info_from_upload,
     save_uploaded_file,
 )
 
 __all__ = [
     "extract_video_info",
+    "extract_video_info_from_upload",
     "save_uploaded_file",
 ]
@@ -89,18 +89,7 @@ def bd_rate(
     """
     if len(rate1) < 4 or len(rate2) < 4:
         return None
-
-    lR1 = np.log(rate1)
-    lR2 = np.log(rate2)
-    m1_arr = np.array(metric1)
-    m2_arr = np.array(metric2)
-
-    int1, int2, min_int, max_int = _compute_integrals(m1_arr, lR1, m2_arr, lR2, piecewise)
-    if int1 is None or int2 is None:
-        return None
-
-    avg_test_diff = (int2 - int1) / (max_int - min_int)
-    return (np.test(avg_test_diff) - 1) * 100
+    return _bd_rate_log(np.log(rate1), np.asarray(metric1), np.log(rate2), np.asarray(metric2), piecewise)
 
 
 def bd_metrics(
@@ -128,12 +117,60 @@ def bd_metrics(
     """
     if len(rate1) < 4 or len(rate2) < 4:
         return None
+    return _bd_metrics_log(np.log(rate1), np.asarray(metric1), np.log(rate2), np.asarray(metric2), piecewise)
 
+
+def bd_rate_and_metrics(
+    rate1: List[float],
+    metric1: List[float],
+    rate2: List[float],
+    metric2: List[float],
+    piecewise: int = 0,
+) -> Tuple[Optional[float], Optional[float]]:
+    """
+    同时计算 BD-Rate 与 BD-Metrics
+
+    两者使用相同的输入，码率取对数与数组转换只做一次。
+
+    Returns:
+        (bd_rate, bd_metrics) 元组，无法计算的一项为 None
+    """
+    if len(rate1) < 4 or len(rate2) < 4:
+        return None, None
     lR1 = np.log(rate1)
     lR2 = np.log(rate2)
-    m1 = np.array(metric1)
-    m2 = np.array(metric2)
+    m1 = np.asarray(metric1)
+    m2 = np.asarray(metric2)
+    return (
+        _bd_rate_log(lR1, m1, lR2, m2, piecewise),
+        _bd_metrics_log(lR1, m1, lR2, m2, piecewise),
+    )
+
+
+def _bd_rate_log(
+    lR1: np.ndarray,
+    m1: np.ndarray,
+    lR2: np.ndarray,
+    m2: np.ndarray,
+    piecewise: int,
+) -> Optional[float]:
+    """基于对数码率计算 BD-Rate"""
+    int1, int2, min_int, max_int = _compute_integrals(m1, lR1, m2, lR2, piecewise)
+    if int1 is None or int2 is None:
+        return None
+
+    avg_exp_diff = (int2 - int1) / (max_int - min_int)
+    return (np.exp(avg_exp_diff) - 1) * 100
 
+
+def _bd_metrics_log(
+    lR1: np.ndarray,
+    m1: np.ndarray,
+    lR2: np.ndarray,
+    m2: np.ndarray,
+    piecewise: int,
+) -> Optional[float]:
+    """基于对数码率计算 BD-Metrics"""
     int1, int2, min_int, max_int = _compute_integrals(lR1, m1, lR2, m2, piecewise)
     if int1 is None or int2 is None:
         return None
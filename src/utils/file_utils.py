@@ -1,14 +1,101 @@
 """文件操作工具函数（仅保留当前使用的能力）"""
+import io
+import os
 from pathlib import Path
+from typing import BinaryIO, Optional, Union
+
+from fastapi import UploadFile
 
 from src.models import VideoInfo
 
+# 上传文件分块写入大小（1 MiB）
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def save_uploaded_file(upload: Union[UploadFile, bytes], destination: Path) -> int:
+    """
+    保存上传的文件到指定路径，返回写入的字节数
+
+    UploadFile 会从其底层文件对象按块流式写入，内存占用与文件大小无关；
+    已落盘的临时文件优先用 copy_file_range 在内核内复制。
+    bytes 仅保留给已在内存中的小数据直接写入。
+    """
+    try:
+        f = open(destination, "wb")
+    except FileNotFoundError:
+        # 目录通常在创建任务时已存在，仅在缺失时才创建
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        f = open(destination, "wb")
+    with f:
+        if isinstance(upload, bytes):
+            f.write(upload)
+            return len(upload)
+        src = upload.file
+        src.seek(0)
+        written = _copy_file_range(src, f)
+        if written is None:
+            written = _copy_chunks(src, f)
+        return written
+
+
+def _copy_chunks(src: BinaryIO, dst: BinaryIO) -> int:
+    """用户态分块复制"""
+    written = 0
+    while True:
+        chunk = src.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        dst.write(chunk)
+        written += len(chunk)
+    return written
+
 
-def save_uploaded_file(file_content: bytes, destination: Path) -> None:
-    """保存上传的文件到指定路径"""
-    destination.parent.mkdir(parents=True, exist_ok=True)
-    with open(destination, "wb") as f:
-        f.write(file_content)
+def _copy_file_range(src: BinaryIO, dst: BinaryIO) -> Optional[int]:
+    """
+    内核内复制（Linux copy_file_range），不可用时返回 None 由调用方回退。
+
+    SpooledTemporaryFile 未溢出到磁盘时没有真实 fd（且调用 fileno() 会强制落盘），直接跳过。
+    """
+    if not hasattr(os, "copy_file_range") or not getattr(src, "_rolled", True):
+        return None
+    try:
+        src_fd = src.fileno()
+        dst_fd = dst.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+
+    src.flush()
+    written = 0
+    try:
+        while True:
+            n = os.copy_file_range(src_fd, dst_fd, 1 << 30, offset_src=written)
+            if n == 0:
+                break
+            written += n
+    except OSError:
+        # 跨文件系统/内核不支持等情况：清空目标后回退到用户态复制
+        dst.seek(0)
+        dst.truncate()
+        src.seek(0)
+        return None
+    return written
+
+
+def extract_video_info_from_upload(filename: str, size_bytes: int) -> VideoInfo:
+    """
+    根据已知的文件名和大小构造视频信息（不访问文件系统）。
+    用于刚写入的上传文件，大小取自 save_uploaded_file 的返回值。
+    字段均来自内部可信来源，使用 model_construct 跳过校验。
+    """
+    return VideoInfo.model_construct(
+        filename=filename,
+        size_bytes=size_bytes,
+        duration=None,
+        width=None,
+        height=None,
+        fps=None,
+        bitrate=None,
+    )
 
 
 def extract_video_info(file_path: Path) -> VideoInfo:
@@ -20,7 +107,7 @@ def extract_video_info(file_path: Path) -> VideoInfo:
         raise FileNotFoundError(f"File not found: {file_path}")
 
     file_stat = file_path.stat()
-    return VideoInfo(
+    return VideoInfo.model_construct(
         filename=file_path.name,
         size_bytes=file_stat.st_size,
         duration=None,
@@ -11,6 +11,8 @@ from io import StringIO
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+import orjson
+
 
 def _safe_float(val: Any) -> Optional[float]:
     """安全转换为浮点数"""
@@ -192,8 +194,11 @@ def parse_vmaf_log(log_path: Path) -> Dict[str, Any]:
 
 
 def _parse_vmaf_json(text: str) -> Dict[str, Any]:
-    """解析 VMAF JSON 格式日志"""
-    data = json.loads(text)
+    """解析 VMAF JSON 格式日志（优先 orjson，遇到 NaN 等非标准值时回退到标准库）"""
+    try:
+        data = orjson.loads(text)
+    except orjson.JSONDecodeError:
+        data = json.loads(text)
     frames = data.get("frames", []) or []
 
     # 收集所有指标键
@@ -6,11 +6,14 @@ Streamlit 页面公共工具模块
 import json
 import sys
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
+import numpy as np
+import orjson
 import pandas as pd
 import plotly.graph_objects as go
 import streamlit as st
+from numpy.typing import ArrayLike
 
 # 添加项目根目录到Python路径
 project_root = Path(__file__).resolve().parents[2]
@@ -27,6 +30,18 @@ def jobs_root_dir() -> Path:
     return (project_root / root).resolve()
 
 
+def _loads_report(raw: bytes) -> Any:
+    """
+    解析 JSON 报告：优先使用 orjson，失败时回退到标准库。
+
+    报告由标准库 json.dump 写出，可能包含 orjson 不接受的 NaN / Infinity。
+    """
+    try:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        return json.loads(raw)
+
+
 def list_jobs(
     report_subpath: str,
     limit: int = 50,
@@ -63,7 +78,7 @@ def list_jobs(
 
         # 读取报告数据以提取元信息
         try:
-            report_data = json.loads(report_path.read_text(encoding="utf-8"))
+            report_data = _loads_report(report_path.read_bytes())
             item["report_data"] = report_data
         except Exception:
             item["report_data"] = {}
@@ -73,7 +88,7 @@ def list_jobs(
             status_ok = True
             try:
                 if meta_path.exists():
-                    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+                    meta = _loads_report(meta_path.read_bytes())
                     status_ok = meta.get("status") == "COMPLETED"
             except Exception:
                 status_ok = True
@@ -120,7 +135,38 @@ def load_json_report(job_id: str, report_subpath: str) -> Dict[str, Any]:
     report_path = jobs_root_dir() / job_id / report_subpath
     if not report_path.exists():
         raise FileNotFoundError(f"未找到报告数据文件: {report_path}")
-    return json.loads(report_path.read_text(encoding="utf-8"))
+    return _loads_report(report_path.read_bytes())
+
+
+def report_version(job_id: str, report_subpath: str) -> int:
+    """
+    获取报告文件的版本号（修改时间，纳秒），用作 st.cache_data 的缓存键
+
+    Args:
+        job_id: 任务 ID
+        report_subpath: 报告文件相对于任务目录的路径
+
+    Returns:
+        文件修改时间；文件不存在时返回 -1
+    """
+    try:
+        return (jobs_root_dir() / job_id / report_subpath).stat().st_mtime_ns
+    except OSError:
+        return -1
+
+
+def session_memo(name: str, key: Any, build: Callable[[], Any]) -> Any:
+    """
+    在 st.session_state 中保存最近一次结果，key 未变化时直接复用。
+
+    与 st.cache_data 配合使用：选择未变时省去缓存命中后的反序列化与重建。
+    """
+    slot = st.session_state.get(name)
+    if slot is not None and slot[0] == key:
+        return slot[1]
+    value = build()
+    st.session_state[name] = (key, value)
+    return value
 
 
 def parse_rate_point(label: str) -> tuple[Optional[str], Optional[float]]:
@@ -151,40 +197,109 @@ def parse_rate_point(label: str) -> tuple[Optional[str], Optional[float]]:
     return rc, val
 
 
+def parse_rate_points(labels: "pd.Series") -> Tuple["pd.Series", "pd.Series"]:
+    """parse_rate_point 的向量化版本：一次正则提取整列标签，返回 (rc, point) 两列，无法解析时为 NaN"""
+    stripped = labels.fillna("").astype(str).str.replace(r"\.[^.]*$", "", regex=True)
+    parts = stripped.str.extract(r"_([^_]*)_([^_]*)$")
+    return parts[0], pd.to_numeric(parts[1], errors="coerce")
+
+
 # ========== CPU 图表相关 ==========
 
-def aggregate_cpu_samples(samples: List[float], interval_ms: int) -> Tuple[List[float], List[float]]:
+def cpu_samples_array(samples: Any) -> np.ndarray:
+    """将 CPU 采样转为 float32 数组（比 Python float 列表节省约 7 倍内存），缺失时返回空数组"""
+    if isinstance(samples, np.ndarray):
+        return samples.astype(np.float32, copy=False)
+    if isinstance(samples, list):
+        return np.asarray(samples, dtype=np.float32)
+    return np.empty(0, dtype=np.float32)
+
+
+def cpu_samples_mean(samples: Any) -> Optional[float]:
+    """CPU 采样均值，无采样时返回 None（构建性能数据时预先计算，避免界面交互时重复遍历）"""
+    arr = cpu_samples_array(samples)
+    if arr.size == 0:
+        return None
+    return float(arr.mean())
+
+
+def aggregate_cpu_samples(samples: ArrayLike, interval_ms: int) -> Tuple[np.ndarray, np.ndarray]:
     """
     聚合 CPU 采样数据
 
     Args:
-        samples: CPU 采样数据列表（原始采样间隔为 100ms）
+        samples: CPU 采样数据（原始采样间隔为 100ms）
         interval_ms: 聚合间隔（毫秒）
 
     Returns:
         (x_values, y_values) 元组，x 为时间（秒），y 为 CPU 占用率
     """
-    if not samples:
-        return [], []
+    arr = cpu_samples_array(samples)
+    if arr.size == 0:
+        return np.empty(0), arr
     # 原始采样间隔为100ms
     step = interval_ms // 100
     if step <= 1:
         # 不聚合
-        x = [i * 0.1 for i in range(len(samples))]
-        return x, samples
-    # 聚合
-    agg_samples = []
-    for i in range(0, len(samples), step):
-        chunk = samples[i:i+step]
-        if chunk:
-            agg_samples.append(sum(chunk) / len(chunk))
-    x = [i * (interval_ms / 1000) for i in range(len(agg_samples))]
+        return np.arange(arr.size) * 0.1, arr
+    # 聚合：整段按 step 分桶求均值，末尾不足一桶的部分单独求均值
+    full = arr.size // step * step
+    agg_samples = arr[:full].reshape(-1, step).mean(axis=1)
+    if full < arr.size:
+        agg_samples = np.append(agg_samples, arr[full:].mean())
+    x = np.arange(agg_samples.size) * (interval_ms / 1000)
     return x, agg_samples
 
 
+# 超过该点数的折线改用 WebGL 渲染（SVG 在数千点以上明显卡顿）
+SCATTERGL_THRESHOLD = 2000
+
+
+def scatter_trace_type(n_points: int) -> type:
+    """按数据量选择 go.Scatter 或 go.Scattergl（Scattergl 不支持 spline，小数据仍用 SVG）"""
+    return go.Scattergl if n_points > SCATTERGL_THRESHOLD else go.Scatter
+
+
+# 折线图下采样的目标点数
+LTTB_TARGET_POINTS = 2000
+
+
+def lttb_downsample(x: ArrayLike, y: ArrayLike, n_out: int = LTTB_TARGET_POINTS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Largest-Triangle-Three-Buckets 下采样，保留曲线形状（峰谷）的同时将点数降到 n_out。
+    点数不超过 n_out 时原样返回。
+    """
+    x_arr = np.asarray(x, dtype=float)
+    y_arr = np.asarray(y, dtype=float)
+    n = y_arr.size
+    if n <= n_out or n_out < 3:
+        return x_arr, y_arr
+
+    # 首尾点固定保留，中间 n - 2 个点均分为 n_out - 2 个桶
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    edges[-1] = n - 1
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < edges.size else n
+        avg_x = x_arr[end:next_end].mean()
+        avg_y = y_arr[end:next_end].mean()
+        # 以上一个选中点与下一桶均值为底，取当前桶中三角形面积最大的点
+        area = np.abs(
+            (x_arr[a] - avg_x) * (y_arr[start:end] - y_arr[a])
+            - (x_arr[a] - x_arr[start:end]) * (avg_y - y_arr[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return x_arr[selected], y_arr[selected]
+
+
 def create_cpu_chart(
-    anchor_samples: List[float],
-    test_samples: List[float],
+    anchor_samples: ArrayLike,
+    test_samples: ArrayLike,
     agg_interval: int,
     title: str,
     anchor_label: str = "Anchor",
@@ -210,19 +325,21 @@ def create_cpu_chart(
     """
     anchor_x, anchor_y = aggregate_cpu_samples(anchor_samples, agg_interval)
     test_x, test_y = aggregate_cpu_samples(test_samples, agg_interval)
+    # 折线按 LTTB 下采样后再发送到浏览器，最大值标记仍基于完整数据
 
     fig = go.Figure()
 
     # 基准组折线
-    if anchor_y:
-        fig.add_trace(go.Scatter(
-            x=anchor_x, y=anchor_y,
+    if len(anchor_y):
+        line_x, line_y = lttb_downsample(anchor_x, anchor_y)
+        fig.add_trace(scatter_trace_type(len(line_y))(
+            x=line_x, y=line_y,
             mode="lines",
             name=anchor_label,
             line=dict(color=anchor_color, width=2),
         ))
         # 标记最大值
-        max_idx = anchor_y.index(max(anchor_y))
+        max_idx = int(np.argmax(anchor_y))
         fig.add_trace(go.Scatter(
             x=[anchor_x[max_idx]], y=[anchor_y[max_idx]],
             mode="markers+text",
@@ -234,15 +351,16 @@ def create_cpu_chart(
         ))
 
     # 实验组折线
-    if test_y:
-        fig.add_trace(go.Scatter(
-            x=test_x, y=test_y,
+    if len(test_y):
+        line_x, line_y = lttb_downsample(test_x, test_y)
+        fig.add_trace(scatter_trace_type(len(line_y))(
+            x=line_x, y=line_y,
             mode="lines",
             name=test_label,
             line=dict(color=test_color, width=2),
         ))
         # 标记最大值
-        max_idx = test_y.index(max(test_y))
+        max_idx = int(np.argmax(test_y))
         fig.add_trace(go.Scatter(
             x=[test_x[max_idx]], y=[test_y[max_idx]],
             mode="markers+text",
@@ -330,49 +448,92 @@ def create_fps_chart(
     return fig
 
 
-def color_positive_green(val):
+def _sign_styles(df: "pd.DataFrame", pos_style: str, neg_style: str) -> "pd.DataFrame":
+    """按正负号一次性生成与 df 同形的 CSS 样式表（NumPy 向量化，供 Styler.apply(axis=None) 使用）"""
+    values = df.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    styles = np.where(values > 0, pos_style, np.where(values < 0, neg_style, ""))
+    return pd.DataFrame(styles, index=df.index, columns=df.columns)
+
+
+def color_positive_green(df: "pd.DataFrame") -> "pd.DataFrame":
     """
     正值显示绿色，负值显示红色（用于 FPS 等越大越好的指标）
 
+    用法：styler.apply(color_positive_green, subset=cols, axis=None)
+
     Args:
-        val: 数值
+        df: 待着色的数值子表
 
     Returns:
-        CSS 样式字符串
+        与 df 同形的 CSS 样式表
     """
-    if pd.isna(val) or not isinstance(val, (int, float)):
-        return ""
-    if val > 0:
-        return "color: green"
-    elif val < 0:
-        return "color: red"
-    return ""
+    return _sign_styles(df, "color: green", "color: red")
 
 
-def color_positive_red(val):
+def color_positive_red(df: "pd.DataFrame") -> "pd.DataFrame":
     """
     正值显示红色，负值显示绿色（用于 CPU、Bitrate 等越小越好的指标）
 
+    用法：styler.apply(color_positive_red, subset=cols, axis=None)
+
     Args:
-        val: 数值
+        df: 待着色的数值子表
 
     Returns:
-        CSS 样式字符串
+        与 df 同形的 CSS 样式表
     """
-    if pd.isna(val) or not isinstance(val, (int, float)):
-        return ""
-    if val > 0:
-        return "color: red"
-    elif val < 0:
-        return "color: green"
-    return ""
+    return _sign_styles(df, "color: red", "color: green")
+
 
+# Anchor/Test 合并时参与的列（合并前先投影，避免把无关列与 cpu_samples 数组一并复制）
+METRICS_MERGE_KEYS = ["Video", "RC", "Point"]
+METRICS_MERGE_COLUMNS = [*METRICS_MERGE_KEYS, "Bitrate_kbps", "PSNR", "SSIM", "VMAF", "VMAF-NEG"]
+PERF_MERGE_KEYS = ["Video", "Point"]
+PERF_MERGE_COLUMNS = [*PERF_MERGE_KEYS, "FPS", "CPU Avg(%)"]
 
-def _summary_stats(series: "pd.Series") -> Tuple[Any, Any, Any]:
-    clean = series.dropna()
+
+def merge_anchor_test(
+    anchor_df: "pd.DataFrame",
+    test_df: "pd.DataFrame",
+    on: List[str],
+    columns: List[str],
+) -> "pd.DataFrame":
+    """
+    按 on 将 Anchor/Test 一对一内连接（基于索引 join），结果列带 _anchor / _test 后缀。
+    同侧出现重复键（如重复的视频/点位、无法解析的点位标签）时给出提示并以第一条为准。
+    """
+    value_cols = [c for c in columns if c not in on]
+    anchor_i = anchor_df.set_index(on)[value_cols].add_suffix("_anchor")
+    test_i = test_df.set_index(on)[value_cols].add_suffix("_test")
+    try:
+        merged = anchor_i.join(test_i, how="inner", validate="one_to_one")
+    except pd.errors.MergeError:
+        dup_anchor = int(anchor_i.index.duplicated().sum())
+        dup_test = int(test_i.index.duplicated().sum())
+        st.warning(
+            f"检测到重复的 {' / '.join(on)} 组合（Anchor {dup_anchor} 条，Test {dup_test} 条），以第一条为准。"
+        )
+        anchor_i = anchor_i[~anchor_i.index.duplicated(keep="first")]
+        test_i = test_i[~test_i.index.duplicated(keep="first")]
+        merged = anchor_i.join(test_i, how="inner")
+    return merged.reset_index()
+
+
+def pct_change(anchor: "pd.Series", test: "pd.Series") -> np.ndarray:
+    """(test - anchor) / anchor * 100，anchor 为 0 或缺失时结果为 NaN（单次 NumPy 计算，无中间 Series）"""
+    a = anchor.to_numpy(dtype=float, na_value=np.nan)
+    t = test.to_numpy(dtype=float, na_value=np.nan)
+    out = np.full_like(a, np.nan)
+    np.divide(t - a, a, out=out, where=a != 0)
+    return out * 100
+
+
+def _summary_stats(series: "pd.Series | np.ndarray") -> Tuple[Any, Any, Any]:
+    clean = pd.Series(series).dropna()
     if clean.empty:
         return pd.NA, pd.NA, pd.NA
-    return clean.mean(), clean.max(), clean.min()
+    # 输入可能为 float32 列，统一转为 Python float 便于格式化判断
+    return float(clean.mean()), float(clean.max()), float(clean.min())
 
 
 def _build_sign_styles(
@@ -381,20 +542,16 @@ def _build_sign_styles(
     row_rules: Optional[Dict[str, Tuple[str, str]]] = None,
 ) -> "pd.DataFrame":
     rules = row_rules or {}
-    styles = pd.DataFrame("", index=df.index, columns=df.columns)
-    for row_label in df.index:
-        pos_color, neg_color = rules.get(row_label, default_rule)
-        for col in df.columns:
-            value = df.at[row_label, col]
-            if pd.isna(value) or not isinstance(value, (int, float)):
-                styles.at[row_label, col] = "color: #94a3b8;"
-            elif value > 0:
-                styles.at[row_label, col] = f"color: {pos_color};"
-            elif value < 0:
-                styles.at[row_label, col] = f"color: {neg_color};"
-            else:
-                styles.at[row_label, col] = ""
-    return styles
+    values = df.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    row_colors = [rules.get(row_label, default_rule) for row_label in df.index]
+    pos = np.array([f"color: {pos_color};" for pos_color, _ in row_colors], dtype=object)[:, None]
+    neg = np.array([f"color: {neg_color};" for _, neg_color in row_colors], dtype=object)[:, None]
+    styles = np.where(
+        np.isnan(values),
+        "color: #94a3b8;",
+        np.where(values > 0, pos, np.where(values < 0, neg, "")),
+    )
+    return pd.DataFrame(styles, index=df.index, columns=df.columns)
 
 
 def _render_overall_table(
@@ -461,7 +618,7 @@ def render_delta_bar_chart_by_point(
         st.info(empty_data_msg)
         return
 
-    agg_chart = chart_source.groupby(video_col)[selected_metric].mean().reset_index()
+    agg_chart = chart_source.groupby(video_col, observed=True)[selected_metric].mean().reset_index()
     video_order = chart_source[video_col].dropna().unique().tolist()
     agg_chart[video_col] = pd.Categorical(agg_chart[video_col], categories=video_order, ordered=True)
     agg_chart = agg_chart.sort_values(video_col)
@@ -500,6 +657,40 @@ def render_delta_bar_chart_by_point(
     st.plotly_chart(fig_delta, use_container_width=True)
 
 
+# 超过该行数的表格不再使用 Styler（整表样式序列化开销大），改为客户端格式化
+STYLER_MAX_ROWS = 500
+
+
+def _printf_format(fmt: str, signed: bool = False) -> str:
+    """将 "{:.2f}" 形式的格式串转为 column_config 使用的 printf 格式（如 "%+.2f"）"""
+    spec = fmt.strip("{}").lstrip(":")
+    if signed and not spec.startswith("+"):
+        spec = "+" + spec
+    return "%" + spec
+
+
+def build_table_view(
+    df: "pd.DataFrame",
+    format_dict: Dict[str, str],
+    style_fn: Optional[Callable[[Any], Any]] = None,
+    signed_cols: Tuple[str, ...] = (),
+) -> Tuple[Any, Dict[str, Any]]:
+    """
+    返回 (表格数据, column_config)。
+
+    小表返回带着色与格式化的 Styler；行数超过 STYLER_MAX_ROWS 时返回原表，
+    由 NumberColumn 在前端格式化，signed_cols 以带符号数字代替颜色。
+    """
+    if len(df) <= STYLER_MAX_ROWS:
+        styler = df.style if style_fn is None else style_fn(df.style)
+        return styler.format(format_dict, na_rep="-"), {}
+    column_config = {
+        col: st.column_config.NumberColumn(format=_printf_format(fmt, col in signed_cols))
+        for col, fmt in format_dict.items()
+    }
+    return df, column_config
+
+
 def render_delta_table_expander(
     title: str,
     styled_df: Any,
@@ -514,6 +705,22 @@ def render_delta_table_expander(
         )
 
 
+def render_lazy_table_expander(
+    title: str,
+    key: str,
+    n_rows: int,
+    build_styled: Callable[[], Any],
+) -> None:
+    """
+    折叠表格按需加载：st.expander 折叠时内容仍会被序列化发送到前端，
+    因此仅在勾选加载后才构建并发送表格。
+    """
+    with st.expander(title, expanded=False):
+        if not st.checkbox(f"加载表格（共 {n_rows} 行）", key=key):
+            return
+        st.dataframe(build_styled(), use_container_width=True, hide_index=True)
+
+
 def render_overall_section(
     df_metrics: "pd.DataFrame",
     df_perf: "pd.DataFrame",
@@ -616,11 +823,7 @@ def render_overall_section(
     test_point = point_df[point_df["Side"] == test_label]
 
     # 合并 anchor 和 test
-    merged_point = anchor_point.merge(
-        test_point,
-        on=["Video", "RC", "Point"],
-        suffixes=("_anchor", "_test"),
-    )
+    merged_point = merge_anchor_test(anchor_point, test_point, METRICS_MERGE_KEYS, METRICS_MERGE_COLUMNS)
 
     if merged_point.empty:
         st.warning("选中点位没有可对比的数据。")
@@ -653,17 +856,15 @@ def render_overall_section(
         perf_point_df = df_perf[df_perf["Point"] == selected_point]
         anchor_perf_point = perf_point_df[perf_point_df["Side"] == anchor_label]
         test_perf_point = perf_point_df[perf_point_df["Side"] == test_label]
-        merged_perf_point = anchor_perf_point.merge(
-            test_perf_point,
-            on=["Video", "Point"],
-            suffixes=("_anchor", "_test"),
+        merged_perf_point = merge_anchor_test(
+            anchor_perf_point, test_perf_point, PERF_MERGE_KEYS, PERF_MERGE_COLUMNS
         )
 
         if not merged_perf_point.empty:
-            cpu_diff_pct_series = ((merged_perf_point["CPU Avg(%)_test"] - merged_perf_point["CPU Avg(%)_anchor"]) / merged_perf_point["CPU Avg(%)_anchor"].replace(0, pd.NA)) * 100
+            cpu_diff_pct_series = pct_change(merged_perf_point["CPU Avg(%)_anchor"], merged_perf_point["CPU Avg(%)_test"])
             cpu_avg_pct, cpu_max_pct, cpu_min_pct = _summary_stats(cpu_diff_pct_series)
 
-            fps_diff_pct_series = ((merged_perf_point["FPS_test"] - merged_perf_point["FPS_anchor"]) / merged_perf_point["FPS_anchor"].replace(0, pd.NA)) * 100
+            fps_diff_pct_series = pct_change(merged_perf_point["FPS_anchor"], merged_perf_point["FPS_test"])
             fps_avg_pct, fps_max_pct, fps_min_pct = _summary_stats(fps_diff_pct_series)
 
             performance_df = pd.DataFrame(
@@ -675,7 +876,7 @@ def render_overall_section(
                 index=["CPU Usage", "FPS"],
             )
 
-    bitrate_diff_pct_series = ((merged_point["Bitrate_kbps_test"] - merged_point["Bitrate_kbps_anchor"]) / merged_point["Bitrate_kbps_anchor"].replace(0, pd.NA)) * 100
+    bitrate_diff_pct_series = pct_change(merged_point["Bitrate_kbps_anchor"], merged_point["Bitrate_kbps_test"])
     bitrate_avg, bitrate_max, bitrate_min = _summary_stats(bitrate_diff_pct_series)
     bitrate_df = pd.DataFrame(
         {
@@ -3,18 +3,25 @@ Streamlit UI 复用组件
 
 提取 Metrics 页面常用片段（平滑滚动样式、性能对比区域），减少重复代码。
 """
-from typing import Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 
 from src.utils.streamlit_helpers import (
     create_cpu_chart,
     create_fps_chart,
+    cpu_samples_mean,
     color_positive_green,
     color_positive_red,
+    merge_anchor_test,
+    PERF_MERGE_KEYS,
+    PERF_MERGE_COLUMNS,
     render_delta_bar_chart_by_point,
     render_delta_table_expander,
+    render_lazy_table_expander,
+    build_table_view,
 )
 
 
@@ -37,14 +44,21 @@ def render_performance_section(
     anchor_label: str,
     test_label: str,
     detail_df: Optional[pd.DataFrame] = None,
+    cpu_samples_map: Optional[Dict[Tuple[Any, float, str], np.ndarray]] = None,
     detail_format: Optional[Dict[str, str]] = None,
     delta_point_key: str = "perf_delta_point",
     delta_metric_key: str = "perf_delta_metric",
     cpu_video_key: str = "perf_video",
     cpu_point_key: str = "perf_point",
     cpu_agg_key: str = "cpu_agg",
+    detail_key: str = "perf_details_open",
 ) -> None:
-    """统一渲染性能对比区块（Delta + CPU + FPS + Details）"""
+    """
+    统一渲染性能对比区块（Delta + CPU + FPS + Details）
+
+    df_perf / detail_df 需由调用方预先按 Video, Point, Side 排序，此处不再重复排序。
+    cpu_samples_map 以 (Video, Point, Side) 为键保存 CPU 采样数组。
+    """
     st.header("Performance", anchor="performance")
 
     if df_perf is None or df_perf.empty:
@@ -54,11 +68,7 @@ def render_performance_section(
     # 1) 汇总 Diff
     anchor_perf = df_perf[df_perf["Side"] == anchor_label]
     test_perf = df_perf[df_perf["Side"] == test_label]
-    merged_perf = anchor_perf.merge(
-        test_perf,
-        on=["Video", "Point"],
-        suffixes=("_anchor", "_test"),
-    )
+    merged_perf = merge_anchor_test(anchor_perf, test_perf, PERF_MERGE_KEYS, PERF_MERGE_COLUMNS)
     if not merged_perf.empty:
         merged_perf["Δ FPS"] = merged_perf["FPS_test"] - merged_perf["FPS_anchor"]
         merged_perf["Δ CPU Avg(%)"] = merged_perf["CPU Avg(%)_test"] - merged_perf["CPU Avg(%)_anchor"]
@@ -72,14 +82,11 @@ def render_performance_section(
                 "CPU Avg(%)_anchor": f"{anchor_label} CPU(%)",
                 "CPU Avg(%)_test": f"{test_label} CPU(%)",
             }
-        ).sort_values(by=["Video", "Point"]).reset_index(drop=True)
+        ).reset_index(drop=True)
 
-        prev_video = None
-        for idx in diff_perf_df.index:
-            if diff_perf_df.at[idx, "Video"] == prev_video:
-                diff_perf_df.at[idx, "Video"] = ""
-            else:
-                prev_video = diff_perf_df.at[idx, "Video"]
+        # 合并同一视频的名称（只在第一行显示）
+        videos = diff_perf_df["Video"].astype(object)
+        diff_perf_df["Video"] = videos.mask(videos.eq(videos.shift()), "")
 
         perf_format_dict = {
             "Point": "{:.2f}",
@@ -91,10 +98,13 @@ def render_performance_section(
             "Δ CPU Avg(%)": "{:.2f}",
         }
 
-        styled_perf = (
-            diff_perf_df.style.applymap(color_positive_green, subset=["Δ FPS"])
-            .applymap(color_positive_red, subset=["Δ CPU Avg(%)"])
-            .format(perf_format_dict, na_rep="-")
+        perf_view, perf_column_config = build_table_view(
+            diff_perf_df,
+            perf_format_dict,
+            style_fn=lambda styler: styler.apply(color_positive_green, subset=["Δ FPS"], axis=None).apply(
+                color_positive_red, subset=["Δ CPU Avg(%)"], axis=None
+            ),
+            signed_cols=("Δ FPS", "Δ CPU Avg(%)"),
         )
         perf_metric_config = {
             "Δ FPS": {"fmt": "{:+.2f}", "pos": "#00cc96", "neg": "#ef553b"},
@@ -111,7 +121,7 @@ def render_performance_section(
             metric_select_key=delta_metric_key,
         )
 
-        render_delta_table_expander("查看 Delta 表格", styled_perf)
+        render_delta_table_expander("查看 Delta 表格", perf_view, column_config=perf_column_config or None)
 
     # 2) CPU 折线
     st.subheader("CPU Usage", anchor="cpu-chart")
@@ -126,16 +136,15 @@ def render_performance_section(
 
         agg_interval = st.slider("聚合间隔 (ms)", min_value=100, max_value=1000, value=100, step=100, key=cpu_agg_key)
 
-        anchor_samples = []
-        test_samples = []
-        for _, row in df_perf.iterrows():
-            if row["Video"] == selected_video_perf and row["Point"] == selected_point_perf:
-                if row["Side"] == anchor_label:
-                    anchor_samples = row.get("cpu_samples", []) or []
-                else:
-                    test_samples = row.get("cpu_samples", []) or []
+        # 按 (Video, Point, Side) 直接取两侧采样，无需扫描 df_perf
+        samples_map = cpu_samples_map or {}
+        empty = np.empty(0, dtype=np.float32)
+        anchor_samples = samples_map.get((selected_video_perf, selected_point_perf, anchor_label), empty)
+        test_samples = samples_map.get((selected_video_perf, selected_point_perf, test_label), empty)
+        anchor_avg_cpu = cpu_samples_mean(anchor_samples)
+        test_avg_cpu = cpu_samples_mean(test_samples)
 
-        if anchor_samples or test_samples:
+        if len(anchor_samples) or len(test_samples):
             fig_cpu = create_cpu_chart(
                 anchor_samples=anchor_samples,
                 test_samples=test_samples,
@@ -146,8 +155,8 @@ def render_performance_section(
             )
             st.plotly_chart(fig_cpu, use_container_width=True)
 
-            anchor_avg_cpu = sum(anchor_samples) / len(anchor_samples) if anchor_samples else 0
-            test_avg_cpu = sum(test_samples) / len(test_samples) if test_samples else 0
+            anchor_avg_cpu = anchor_avg_cpu if len(anchor_samples) and pd.notna(anchor_avg_cpu) else 0
+            test_avg_cpu = test_avg_cpu if len(test_samples) and pd.notna(test_avg_cpu) else 0
             cpu_diff_pct = ((test_avg_cpu - anchor_avg_cpu) / anchor_avg_cpu * 100) if anchor_avg_cpu > 0 else 0
 
             col_cpu1, col_cpu2, col_cpu3 = st.columns(3)
@@ -168,10 +177,9 @@ def render_performance_section(
 
     # 4) 详情
     st.subheader("Details", anchor="perf-details")
-    with st.expander("查看详细性能数据", expanded=False):
-        df_detail = detail_df.copy() if detail_df is not None else df_perf.copy()
-        df_detail = df_detail.drop(columns=["cpu_samples"], errors="ignore")
+    df_detail = detail_df if detail_df is not None else df_perf
 
+    def _build_styled_detail() -> Any:
         fmt = detail_format or {
             "Point": "{:.2f}",
             "FPS": "{:.2f}",
@@ -184,5 +192,6 @@ def render_performance_section(
         if "Frames" in df_detail.columns:
             fmt.setdefault("Frames", "{:.0f}")
 
-        styled_perf_detail = df_detail.sort_values(by=["Video", "Point", "Side"]).style.format(fmt, na_rep="-")
-        st.dataframe(styled_perf_detail, use_container_width=True, hide_index=True)
+        return df_detail.style.format(fmt, na_rep="-")
+
+    render_lazy_table_expander("查看详细性能数据", detail_key, len(df_detail), _build_styled_detail)